@@ -0,0 +1,66 @@
+# bench/corpus.py
+"""Deterministic benchmark corpora (seeded, no data files needed)."""
+from __future__ import annotations
+import random, string
+from typing import Dict, List
+
+SEED = 20240601
+_WORDS = ("password", "summer", "dragon", "monkey", "letmein", "football", "shadow",
+          "master", "welcome", "sunshine", "princess", "qwerty", "admin", "secret",
+          "correct", "horse", "battery", "staple", "orbit", "velvet", "planet", "ember")
+_LEET = str.maketrans({"a": "@", "o": "0", "e": "3", "i": "1", "s": "$"})
+
+
+def short(n: int = 500, seed: int = SEED) -> List[str]:
+    """Typical user passwords: a word, maybe capitalised or leeted, plus digits/years."""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        w = rnd.choice(_WORDS)
+        if rnd.random() < 0.3:
+            w = w.capitalize()
+        if rnd.random() < 0.2:
+            w = w.translate(_LEET)
+        tail = rnd.choice(["", "1", "123", "!", str(rnd.randint(1970, 2030)), str(rnd.randint(0, 99))])
+        out.append(w + tail)
+    return out
+
+
+def long(n: int = 500, seed: int = SEED + 1) -> List[str]:
+    """Random 20-40 character passwords over the printable ASCII pool."""
+    rnd = random.Random(seed)
+    pool = string.ascii_letters + string.digits + string.punctuation
+    return ["".join(rnd.choice(pool) for _ in range(rnd.randint(20, 40))) for _ in range(n)]
+
+
+def passphrase(n: int = 500, seed: int = SEED + 2) -> List[str]:
+    """Diceware-style phrases of 4-6 words."""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        words = [rnd.choice(_WORDS) for _ in range(rnd.randint(4, 6))]
+        if rnd.random() < 0.5:
+            words = [w.capitalize() for w in words]
+        out.append(rnd.choice("-_ .").join(words) + (str(rnd.randint(0, 9)) if rnd.random() < 0.5 else ""))
+    return out
+
+
+def adversarial(n: int = 100, seed: int = SEED + 3) -> List[str]:
+    """Inputs built to stress the detectors and the guess DP."""
+    rnd = random.Random(seed)
+    base = [
+        "a" * 64, "ab" * 40, "abcd" * 16, "1234567890" * 6, "qwertyuiop" * 6,
+        "asdfghjkl;" * 6, "2019" * 16, "p@ssw0rd" * 8, "passwordpassword" * 4,
+        "ünïcødé" * 8, "aAaA" * 16, "x" * 200, "zyxwvutsrqponm" * 5,
+        "".join(_WORDS) * 2, "1qaz2wsx3edc4rfv" * 4,
+    ]
+    out = []
+    while len(out) < n:
+        s = rnd.choice(base)
+        cut = rnd.randint(len(s) // 2, len(s))
+        out.append(s[:cut])
+    return out
+
+
+def all_corpora() -> Dict[str, List[str]]:
+    return {"short": short(), "long": long(), "passphrase": passphrase(), "adversarial": adversarial()}
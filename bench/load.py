@@ -0,0 +1,193 @@
+# bench/load.py
+"""
+Open-loop load generator for the breach checker, run against the local range
+stand-in (src/range_server.py) or any server given with --server.
+
+    python bench/load.py --qps 200 --duration 10                        # check_pwned_password, 32 threads
+    python bench/load.py --mode batch --qps 2000 --batch-size 100       # check_pwned_passwords
+    python bench/load.py --mode async --qps 1000 --latency-ms 40 --jitter-ms 40
+    python bench/load.py --qps 300 --rate-limit 100 --client-rate 80    # 429s vs the adaptive limiter
+    python bench/load.py --server http://10.0.0.5:8787/range/ --qps 500
+
+Passwords are issued on a fixed schedule of `qps` per second, whether or not
+earlier ones have finished. Latency is measured from each password's
+scheduled start, so time spent queued behind a saturated client counts too
+(no coordinated omission). Batch mode sends `batch-size` passwords per call
+at qps / batch-size calls per second, and reports per-call latency. With the
+in-process stand-in, a `--breached` fraction of the passwords is seeded into
+its corpus and every result is checked against it.
+"""
+from __future__ import annotations
+import argparse, json, os, secrets, sys, threading, time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+
+import breach_checker as bc  # noqa: E402
+import range_server  # noqa: E402
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Recorder:
+    def __init__(self, expected: Optional[Dict[str, bool]]):
+        self.expected = expected
+        self.latency: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.wrong = 0
+        self.last = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, scheduled: float, results) -> None:
+        done = time.perf_counter()
+        with self._lock:
+            self.latency.append(done - scheduled)
+            self.last = max(self.last, done)
+            for pwd, res in results:
+                self.outcomes[res["error"] or "ok"] += 1
+                if self.expected is not None and not res["error"] and res["found"] != self.expected[pwd]:
+                    self.wrong += 1
+
+
+def _schedule(count: int, interval: float, start: float):
+    """Yield (i, scheduled time), sleeping until each slot comes up."""
+    for i in range(count):
+        at = start + i * interval
+        delay = at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield i, at
+
+
+def run_threads(passwords: List[str], args, rec: Recorder) -> float:
+    batch = args.batch_size if args.mode == "batch" else 1
+    chunks = [passwords[i:i + batch] for i in range(0, len(passwords), batch)]
+    workers = args.concurrency if args.mode == "batch" else args.threads
+
+    def one(items: List[str], scheduled: float) -> None:
+        if args.mode == "batch":
+            results = list(bc.check_pwned_passwords(items, timeout=args.timeout, max_workers=args.threads))
+        else:
+            results = [(items[0], bc.check_pwned_password(items[0], timeout=args.timeout))]
+        rec.record(scheduled, results)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, at in _schedule(len(chunks), batch / args.qps, start):
+            pool.submit(one, chunks[i], at)
+    return start
+
+
+def run_async(passwords: List[str], args, rec: Recorder) -> float:
+    import asyncio
+    import breach_async
+
+    async def main() -> float:
+        async with breach_async.RangeClient(bc.API_BASE, max_connections=args.threads,
+                                            timeout=args.timeout) as client:
+            async def one(pwd: str, scheduled: float) -> None:
+                rec.record(scheduled, [(pwd, await breach_async.check_pwned_password_async(pwd, client))])
+
+            start = time.perf_counter()
+            tasks = []
+            for i, pwd in enumerate(passwords):
+                at = start + i / args.qps
+                delay = at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.ensure_future(one(pwd, at)))
+            await asyncio.gather(*tasks)
+            return start
+
+    return asyncio.run(main())
+
+
+def report(rec: Recorder, start: float, total: int, args, server) -> dict:
+    elapsed = max(rec.last - start, 1e-9)
+    ordered = sorted(rec.latency)
+    ms = lambda v: None if v is None else round(v * 1e3, 2)
+    out = {
+        "mode": args.mode, "target_qps": args.qps, "passwords": total,
+        "seconds": round(elapsed, 3), "throughput": round(total / elapsed, 1),
+        "calls": len(ordered),
+        "latency_ms": {"p50": ms(_percentile(ordered, 0.5)), "p90": ms(_percentile(ordered, 0.9)),
+                       "p99": ms(_percentile(ordered, 0.99)), "max": ms(ordered[-1] if ordered else None)},
+        "outcomes": dict(rec.outcomes),
+        "wrong": rec.wrong if rec.expected is not None else None,
+        "client": bc.network_stats(),
+        "cache": bc.cache_stats()["memory"],
+    }
+    if server is not None:
+        out["server"] = dict(server.stats)
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Drive the breach checker at a target rate.")
+    ap.add_argument("--mode", choices=("single", "batch", "async"), default="single")
+    ap.add_argument("--qps", type=float, default=200.0, help="passwords per second")
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds of load")
+    ap.add_argument("--threads", type=int, default=32, help="worker threads / connections")
+    ap.add_argument("--batch-size", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=4, help="batch mode: batches in flight")
+    ap.add_argument("--timeout", type=float, default=8.0)
+    ap.add_argument("--breached", type=float, default=0.1, help="fraction seeded as breached")
+    ap.add_argument("--client-rate", type=float, default=0.0, help="client token bucket (0 = unlimited)")
+    ap.add_argument("--cache", action="store_true", help="keep the in-memory range cache on")
+    ap.add_argument("--server", default=None, help="existing range endpoint instead of the in-process one")
+    ap.add_argument("--json", default=None, help="also write the report to this file")
+    # stand-in options (in-process server only)
+    range_server.build_parser(ap.add_argument_group("stand-in server"))
+    args = ap.parse_args(argv)
+
+    total = max(1, int(args.qps * args.duration))
+    passwords = [f"load-{i}-{secrets.token_hex(6)}" for i in range(total)]
+    server, expected = None, None
+    if args.server:
+        bc.set_api_base(args.server)
+    else:
+        server = range_server.server_from_args(args, port=0).start()
+        breached = passwords[:int(total * args.breached)]
+        server.seed(breached)
+        expected = dict.fromkeys(passwords, False)
+        expected.update(dict.fromkeys(breached, True))
+        bc.set_api_base(server.base)
+    bc.configure_network(rate=args.client_rate or None, burst=max(1, int(args.client_rate or 1)))
+    if not args.cache:
+        bc._MAX_CACHE = 0  # every lookup goes to the server
+
+    rec = Recorder(expected)
+    try:
+        run = run_async if args.mode == "async" else run_threads
+        start = run(passwords, args, rec)
+    finally:
+        if server is not None:
+            server.stop()
+    out = report(rec, start, total, args, server)
+
+    lat = out["latency_ms"]
+    print(f"{args.mode}: {total} passwords in {out['seconds']}s -> {out['throughput']:,.1f}/s "
+          f"(target {args.qps:,.0f}/s)")
+    print(f"latency ms  p50 {lat['p50']}  p90 {lat['p90']}  p99 {lat['p99']}  max {lat['max']}  "
+          f"over {out['calls']} calls")
+    print(f"outcomes    {out['outcomes']}" + (f"  wrong {out['wrong']}" if expected is not None else ""))
+    c = out["client"]
+    print(f"client      requests {c['requests']}  retries {c['retries']}  429s {c['rate_limited']}  "
+          f"failures {c['failures']}  circuit {c['circuit']}")
+    if server is not None:
+        print(f"server      {out['server']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+    return 1 if out["wrong"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
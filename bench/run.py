@@ -0,0 +1,364 @@
+# bench/run.py
+"""
+Benchmark suite for the hot paths, with stored baselines and regression gates.
+
+    python bench/run.py                      # run everything, compare to bench/baseline.json
+    python bench/run.py -k score --quick     # subset, shorter runs
+    python bench/run.py --save-baseline      # record this machine's numbers
+    python bench/run.py --threshold 0.15     # fail on a >15% slowdown
+
+Each benchmark reports throughput (ops/s, median of several timed samples)
+and allocations (peak traced KiB per call, via tracemalloc: the largest of
+several calls, since a call's peak jumps between a few discrete values with
+how much rejection sampling it needed). A result fails the gate when its
+throughput drops more than `threshold` below the baseline, or its peak
+allocation grows by more than `threshold` (and by at least 64 KiB).
+Benchmarks bound by file I/O, subprocesses or sockets register a wider
+tolerance, which replaces `threshold` when larger. Baselines depend on the
+machine, so record them on the host that runs the gate.
+"""
+from __future__ import annotations
+import argparse, json, os, platform, statistics, sys, time, tracemalloc
+from typing import Callable, Dict, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+sys.path.insert(0, HERE)
+
+import corpus  # noqa: E402
+
+BASELINE = os.path.join(HERE, "baseline.json")
+MIN_ALLOC_KIB = 64.0
+
+NOISY = 0.5  # tolerance for benchmarks dominated by the OS rather than our code
+
+Setup = Callable[[], Tuple[Callable[[], object], int]]
+BENCHES: Dict[str, Setup] = {}
+TOLERANCE: Dict[str, float] = {}
+
+
+def bench(name: str, tolerance: float = 0.0):
+    """Register a setup function returning (fn, operations per fn call)."""
+    def deco(setup: Setup) -> Setup:
+        BENCHES[name] = setup
+        if tolerance:
+            TOLERANCE[name] = tolerance
+        return setup
+    return deco
+
+
+# ---- scoring ----
+
+def _cold():
+    # audits see mostly distinct passwords, so measure without warm memo caches
+    from guess_estimator import _n_choose_up_to
+    _n_choose_up_to.cache_clear()
+
+
+def _score_corpus(name: str) -> Setup:
+    def setup():
+        from scorer_logic import compute_score
+        items = getattr(corpus, name)()
+
+        def fn():
+            _cold()
+            for pwd in items:
+                compute_score(pwd)
+        return fn, len(items)
+    return setup
+
+
+for _name in ("short", "long", "passphrase", "adversarial"):
+    bench(f"score.{_name}")(_score_corpus(_name))
+
+
+@bench("score.batch")
+def _():
+    from scorer_logic import compute_scores
+    items = [p for c in corpus.all_corpora().values() for p in c]
+
+    def fn():
+        _cold()
+        compute_scores(items)
+    return fn, len(items)
+
+
+@bench("score.cache_typing")
+def _():
+    from score_cache import ScoreCache
+    phrases = corpus.passphrase(50)
+
+    def fn():
+        cache = ScoreCache(maxsize=512, incremental=True)
+        for phrase in phrases:
+            for i in range(1, len(phrase) + 1):
+                cache.compute(phrase[:i])
+    return fn, sum(len(p) for p in phrases)
+
+
+# ---- detectors ----
+
+def _detector(name: str, call) -> None:
+    def setup():
+        items = [p for c in corpus.all_corpora().values() for p in c]
+        f = call()
+
+        def fn():
+            for pwd in items:
+                f(pwd)
+        return fn, len(items)
+    bench(f"patterns.{name}")(setup)
+
+
+def _p(attr):
+    return lambda: getattr(__import__("patterns"), attr)
+
+
+_detector("repeats", _p("has_repeated_runs"))
+_detector("sequence", _p("has_simple_sequence"))
+_detector("keyboard", _p("has_keyboard_walk"))
+_detector("year", _p("contains_year"))
+_detector("dictionary", _p("contains_common_word_or_leet"))
+_detector("scan_all", _p("scan_patterns"))
+_detector("guesses", lambda: __import__("guess_estimator").estimate_guesses)
+
+
+# ---- generation ----
+
+@bench("generate.password")
+def _():
+    from password_generator import generate_password
+    return (lambda: [generate_password(16) for _ in range(1000)]), 1000
+
+
+@bench("generate.passwords_bulk")
+def _():
+    from password_generator import generate_passwords
+    return (lambda: sum(1 for _ in generate_passwords(10000, 16))), 10000
+
+
+@bench("generate.passphrase")
+def _():
+    import passphrase_generator as pgen
+    pgen._words()
+    return (lambda: [pgen.generate_passphrase(5) for _ in range(1000)]), 1000
+
+
+@bench("generate.passphrases_bulk")
+def _():
+    import passphrase_generator as pgen
+    pgen._words()
+    return (lambda: sum(1 for _ in pgen.generate_passphrases(10000, 5))), 10000
+
+
+# ---- wordlist / startup ----
+
+@bench("wordlist.load", tolerance=NOISY)
+def _():
+    import passphrase_generator as pgen
+
+    def fn():
+        pgen._LOADED = None
+        pgen._words()
+    return fn, 1
+
+
+@bench("wordlist.parse_text")
+def _():
+    import passphrase_generator as pgen
+    path = next((p for p in pgen.WORDLIST_PATHS if p.exists()), None)
+    if path is None:
+        raise RuntimeError("text wordlist not found")
+
+    def fn():
+        with path.open("r", encoding="utf-8", errors="ignore") as f:
+            pgen.parse_wordlist(f)
+    return fn, 1
+
+
+def _import_bench(stmt: str) -> Setup:
+    def setup():
+        import startup
+
+        def fn():
+            # one fresh interpreter per call; ops/s == imports/s
+            startup.measure(stmt, 1)
+        return fn, 1
+    return setup
+
+
+bench("import.ui", NOISY)(_import_bench("import ui"))
+bench("import.psbc", NOISY)(_import_bench("import psbc; psbc.build_parser(serve=False)"))
+bench("import.scorer", NOISY)(_import_bench("import scorer_logic"))
+
+
+# ---- breach ----
+
+def _breach_setup(batch: bool = False, cached: bool = False) -> Setup:
+    def setup():
+        import breach_checker as bc
+        from range_server import RangeServer
+        items = corpus.short(200)
+        server = RangeServer().start()
+        server.seed(items[::2])
+        bc.set_api_base(server.base)
+        bc.use_offline_index(None)
+        bc.use_prefilter(None)
+        bc.use_disk_cache(None)
+        bc.configure_network(rate=None)
+        _STOP.append(server.stop)
+
+        def fn():
+            if not cached:
+                bc._cache_clear()
+            if batch:
+                for _ in bc.check_pwned_passwords(items, max_workers=8):
+                    pass
+            else:
+                for pwd in items:
+                    bc.check_pwned_password(pwd)
+        return fn, len(items)
+    return setup
+
+
+_STOP = []
+bench("breach.check", NOISY)(_breach_setup())
+bench("breach.check_cached")(_breach_setup(cached=True))
+bench("breach.check_batch", NOISY)(_breach_setup(batch=True))
+
+
+@bench("breach.offline_index")
+def _():
+    import hashlib, shutil, tempfile
+    from offline_index import OfflineIndex, build_index
+    tmp = tempfile.mkdtemp(prefix="psbc-bench-")
+    dump, idx = os.path.join(tmp, "dump.txt"), os.path.join(tmp, "hibp.idx")
+    hashes = sorted(hashlib.sha1(str(i).encode()).hexdigest().upper() for i in range(200000))
+    with open(dump, "w") as f:
+        f.writelines(f"{h}:{i % 50 + 1}\n" for i, h in enumerate(hashes))
+    build_index(dump, idx)
+    index = OfflineIndex(idx)
+    _STOP.append(lambda: (index.close(), shutil.rmtree(tmp, ignore_errors=True)))
+    probes = hashes[::100] + [hashlib.sha1(f"miss{i}".encode()).hexdigest() for i in range(2000)]
+
+    def fn():
+        for h in probes:
+            index.lookup(h)
+    return fn, len(probes)
+
+
+# ---- harness ----
+
+def measure(fn: Callable[[], object], ops: int, min_time: float, repeat: int) -> dict:
+    fn()  # warm up (imports, lazy tables)
+    number = 1
+    while True:
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t
+        if elapsed >= min_time / repeat or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, int(min_time / repeat / elapsed) + 1)
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t) / number)
+    per_call = statistics.median(samples)
+
+    peak = retained = 0
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn()
+            current, top = tracemalloc.get_traced_memory()
+            if top - base >= peak:
+                peak, retained = top - base, current - base
+    finally:
+        tracemalloc.stop()
+    return {
+        "ops_per_sec": round(ops / per_call, 1) if per_call > 0 else float("inf"),
+        "us_per_op": round(per_call / ops * 1e6, 3),
+        "peak_kib": round(peak / 1024, 1),
+        "retained_kib": round(retained / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    failures = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        tol = max(threshold, TOLERANCE.get(name, 0.0))
+        if res["ops_per_sec"] < base["ops_per_sec"] * (1 - tol):
+            failures.append(f"{name}: {res['ops_per_sec']:,.0f} ops/s vs baseline {base['ops_per_sec']:,.0f}")
+        grown = res["peak_kib"] - base["peak_kib"]
+        if grown > MIN_ALLOC_KIB and res["peak_kib"] > base["peak_kib"] * (1 + tol):
+            failures.append(f"{name}: peak {res['peak_kib']:,.0f} KiB vs baseline {base['peak_kib']:,.0f}")
+    return failures
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="PSBC benchmark suite.")
+    ap.add_argument("-k", "--filter", default="", help="only benchmarks whose name contains this")
+    ap.add_argument("--quick", action="store_true", help="shorter timing runs")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed regression (0.25 = 25%%)")
+    ap.add_argument("--json", default=None, help="also write results to this file")
+    ap.add_argument("--list", action="store_true")
+    args = ap.parse_args(argv)
+
+    names = [n for n in BENCHES if args.filter in n]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    min_time, repeat = (0.2, 3) if args.quick else (1.0, 5)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    results = {}
+    try:
+        for name in names:
+            fn, ops = BENCHES[name]()
+            res = results[name] = measure(fn, ops, min_time, repeat)
+            base = baseline.get(name)
+            delta = f"{(res['ops_per_sec'] / base['ops_per_sec'] - 1) * 100:+6.1f}%" if base else "      "
+            print(f"{name:<28} {res['ops_per_sec']:>14,.1f} ops/s {delta}  "
+                  f"{res['us_per_op']:>11,.3f} us/op  peak {res['peak_kib']:>9,.1f} KiB", flush=True)
+    finally:
+        for stop in _STOP:
+            stop()
+
+    meta = {"python": platform.python_version(), "machine": platform.machine(),
+            "platform": platform.platform(), "cpus": os.cpu_count(), "time": int(time.time())}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+    if args.save_baseline:
+        merged = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                merged = json.load(f).get("results", {})
+        merged.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": merged}, f, indent=2, sort_keys=True)
+        print(f"baseline written: {args.baseline}")
+        return 0
+
+    failures = compare(results, baseline, args.threshold)
+    for msg in failures:
+        print("REGRESSION", msg)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
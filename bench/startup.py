@@ -0,0 +1,116 @@
+# bench/startup.py
+"""
+Cold-start benchmark. Each entry point is imported in a fresh interpreter
+under `-X importtime`, several times, and the median is reported:
+
+    import_ms   time spent importing, from the importtime log
+    run_ms      the statement itself, timed inside the child
+    process_ms  whole interpreter launch to exit, timed from outside
+
+GUI and headless entry points are reported separately. The `gui-frame`
+entry (build the main window and draw one frame) only runs when a display
+is available.
+
+    python bench/startup.py [--runs 7] [--top 8] [--json]
+"""
+from __future__ import annotations
+import argparse, json, os, statistics, subprocess, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+MARK = "--psbc-bench-start--"
+
+ENTRY_POINTS = {
+    "gui": [
+        ("gui-import", "import ui"),
+        ("gui-frame", "import ui; r = ui.create_main_window(); r.update(); r.destroy()"),
+    ],
+    "headless": [
+        ("scorer", "import scorer_logic; scorer_logic.compute_score('Tr0ub4dor&3')"),
+        ("password_generator", "import password_generator; password_generator.generate_password()"),
+        ("passphrase_generator", "import passphrase_generator; passphrase_generator.generate_passphrase()"),
+        ("breach_checker", "import breach_checker"),
+        ("stream_audit", "import stream_audit"),
+        ("audit", "import audit"),
+        ("psbc", "import psbc; psbc.build_parser(serve=False)"),
+    ],
+}
+
+
+def _has_display() -> bool:
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def parse_importtime(log: str):
+    """(total import µs, [(self µs, module)]) for imports after the start marker."""
+    lines = log.splitlines()
+    if MARK in lines:
+        lines = lines[lines.index(MARK) + 1:]
+    total, mods = 0, []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        mods.append((int(self_us), name.strip()))
+        if not name[1:].startswith(" "):  # top-level import: cumulative covers its children
+            total += int(cum_us)
+    return total, mods
+
+
+def measure(stmt: str, runs: int):
+    code = (f"import sys, time; t = time.perf_counter(); sys.stderr.write({MARK!r} + '\\n'); "
+            f"{stmt}; print(time.perf_counter() - t)")
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    imports, insides, outsides, mods = [], [], [], []
+    for _ in range(runs):
+        t = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                              capture_output=True, text=True)
+        outsides.append(time.perf_counter() - t)
+        if proc.returncode:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+        total, mods = parse_importtime(proc.stderr)
+        imports.append(total / 1e3)
+        insides.append(float(proc.stdout.strip().splitlines()[-1]) * 1e3)
+    return {
+        "import_ms": round(statistics.median(imports), 1),
+        "run_ms": round(statistics.median(insides), 1),
+        "process_ms": round(statistics.median(outsides) * 1e3, 1),
+        "top": sorted(mods, reverse=True),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Cold-start import benchmark.")
+    ap.add_argument("--runs", type=int, default=7)
+    ap.add_argument("--top", type=int, default=5, help="slowest modules to list per entry point")
+    ap.add_argument("--only", choices=sorted(ENTRY_POINTS), help="run one group")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    results = {}
+    for group, entries in ENTRY_POINTS.items():
+        if args.only and group != args.only:
+            continue
+        for name, stmt in entries:
+            if name == "gui-frame" and not _has_display():
+                continue
+            res = measure(stmt, args.runs)
+            res["top"] = [{"module": m, "self_ms": round(us / 1e3, 1)} for us, m in res["top"][:args.top]]
+            results.setdefault(group, {})[name] = res
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for group, entries in results.items():
+        print(f"[{group}]")
+        for name, res in entries.items():
+            print(f"  {name:<22} import {res['import_ms']:>7.1f} ms   run {res['run_ms']:>7.1f} ms"
+                  f"   process {res['process_ms']:>7.1f} ms")
+            for m in res["top"]:
+                print(f"      {m['self_ms']:>6.1f} ms  {m['module']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+# audit.py
+"""
+Bulk audit of password (or SHA-1 / NTLM hash) files across a process pool.
+
+The input is read in chunks; each chunk is scored with compute_scores (and
+optionally breach-checked) in a worker process, which sends back a small
+aggregate instead of per-password results. Dictionaries and the offline
+index are loaded once in the parent before the pool forks, so workers share
+them read-only; at most `2 * workers` chunks are in flight at a time. Each
+worker keeps 1/workers of the API request rate, so --rate bounds the pool.
+"""
+from __future__ import annotations
+import argparse, json, os, sys
+from collections import deque
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from scorer_logic import LABELS, _numpy, compute_scores, reasons_from_mask
+
+_REASON_BITS = [1 << i for i in range(11)]
+
+
+class AuditReport:
+    """Mergeable aggregate of an audit run."""
+
+    def __init__(self):
+        self.total = 0
+        self.scored = 0                     # entries that went through the scorer
+        self.empty = 0
+        self.labels = [0] * len(LABELS)
+        self.reasons: Dict[int, int] = {bit: 0 for bit in _REASON_BITS}
+        self.score_hist = [0] * 11          # buckets of 10 points; 100 gets its own
+        self.bits_sum = 0.0
+        self.breached = 0
+        self.breach_hits = 0                # sum of breach counts over breached entries
+        self.breach_errors = 0
+        self.invalid = 0
+
+    def merge(self, other: "AuditReport") -> "AuditReport":
+        self.total += other.total
+        self.scored += other.scored
+        self.empty += other.empty
+        self.labels = [a + b for a, b in zip(self.labels, other.labels)]
+        for bit, n in other.reasons.items():
+            self.reasons[bit] = self.reasons.get(bit, 0) + n
+        self.score_hist = [a + b for a, b in zip(self.score_hist, other.score_hist)]
+        self.bits_sum += other.bits_sum
+        self.breached += other.breached
+        self.breach_hits += other.breach_hits
+        self.breach_errors += other.breach_errors
+        self.invalid += other.invalid
+        return self
+
+    def add_scores(self, cols) -> None:
+        n = len(cols.score)
+        self.total += n
+        self.scored += n
+        for i in range(n):
+            self.labels[cols.label[i]] += 1
+            self.score_hist[int(cols.score[i]) // 10] += 1
+            r = int(cols.reasons[i])
+            if r:
+                for bit in _REASON_BITS:
+                    if r & bit:
+                        self.reasons[bit] += 1
+        self.bits_sum += float(sum(cols.bits))
+
+    def add_breach(self, result: dict) -> None:
+        if not result["ok"]:
+            if result["error"] == "invalid_hash":
+                self.invalid += 1
+            else:
+                self.breach_errors += 1
+        elif result["found"]:
+            self.breached += 1
+            self.breach_hits += result["count"]
+
+    def to_dict(self) -> dict:
+        d = {"total": self.total, "scored": self.scored, "empty": self.empty}
+        if self.scored:  # --hashes audits count entries but score none
+            d.update({
+                "labels": dict(zip(LABELS, self.labels)),
+                "reasons": {reasons_from_mask(bit)[0]: n for bit, n in self.reasons.items() if n},
+                "score_histogram": self.score_hist,
+                "mean_bits": round(self.bits_sum / self.scored, 2),
+            })
+        d.update(breached=self.breached, breach_hits=self.breach_hits,
+                 breach_errors=self.breach_errors, invalid=self.invalid)
+        return d
+
+    def format_text(self) -> str:
+        d = self.to_dict()
+        lines = [f"Entries: {d['total']:,} (empty lines skipped: {d['empty']:,})"]
+        if self.scored:
+            lines.append("Labels:  " + ", ".join(f"{k} {v:,}" for k, v in d["labels"].items()))
+            lines.append(f"Mean strength: {d['mean_bits']} bits")
+            for msg, n in sorted(d["reasons"].items(), key=lambda kv: -kv[1]):
+                lines.append(f"  {n:>10,}  {msg}")
+        if self.breached or self.breach_errors or self.invalid:
+            lines.append(f"Breached: {d['breached']:,} (total sightings {d['breach_hits']:,}); "
+                         f"lookup errors {d['breach_errors']:,}; invalid {d['invalid']:,}")
+        return "\n".join(lines)
+
+
+# ---- input ----
+
+def read_chunks(path: str, chunk_size: int = 5000) -> Iterator[List[str]]:
+    """Lines of `path` ('-' = stdin) in lists of `chunk_size`, newline stripped."""
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", errors="replace")
+    try:
+        chunk: List[str] = []
+        for line in f:
+            chunk.append(line.rstrip("\r\n"))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+# ---- worker side ----
+
+_OPTS: dict = {}
+
+
+def _prepare(opts: dict) -> None:
+    """Load shared read-only resources; runs in the parent and in each worker."""
+    global _OPTS
+    if _OPTS == opts:
+        return  # already inherited through fork
+    _OPTS = opts
+    _numpy()  # optional and slow to import: do it once, before the pool forks
+    if opts.get("dictionaries"):
+        import patterns
+        patterns.use_dictionaries(opts["dictionaries"], opts.get("dictionary_cache"))
+    if opts.get("breach"):
+        import breach_checker
+        for path in opts.get("offline_index", ()):
+            breach_checker.use_offline_index(path)
+        if opts.get("prefilter"):
+            breach_checker.use_prefilter(opts["prefilter"])
+
+
+def _init_worker(opts: dict, workers: int) -> None:
+    _prepare(opts)
+    if opts.get("breach"):
+        import breach_checker
+        breach_checker.share_rate(workers)
+
+
+def _audit_chunk(lines: List[str]) -> AuditReport:
+    opts = _OPTS
+    report = AuditReport()
+    items = [l for l in lines if l]
+    report.empty = len(lines) - len(items)
+    if opts.get("hashes"):
+        import breach_checker
+        check = partial(breach_checker.check_pwned_hashes, hash_type=opts.get("hash_type", "sha1"))
+        for _, res in _count_dupes(items, check, opts):
+            report.total += 1
+            report.add_breach(res)
+        return report
+    report.add_scores(compute_scores(items))
+    if opts.get("breach"):
+        import breach_checker
+        for _, res in _count_dupes(items, breach_checker.check_pwned_passwords, opts):
+            report.add_breach(res)
+    return report
+
+
+def _count_dupes(items: List[str], check, opts) -> Iterator:
+    # batch checkers answer once per distinct value; replay for duplicates
+    counts: Dict[str, int] = {}
+    for it in items:
+        counts[it] = counts.get(it, 0) + 1
+    for key, res in check(counts, max_workers=opts.get("threads", 8)):
+        for _ in range(counts[key]):
+            yield key, res
+
+
+# ---- driver ----
+
+def audit_file(path: str, workers: Optional[int] = None, chunk_size: int = 5000,
+               breach: bool = False, hashes: bool = False, hash_type: str = "sha1",
+               dictionaries: Iterable[str] = (), dictionary_cache: Optional[str] = None,
+               offline_index: Iterable[str] = (), prefilter: Optional[str] = None,
+               threads: int = 8) -> AuditReport:
+    """Audit every line of `path` and return the merged report."""
+    opts = {
+        "breach": breach or hashes, "hashes": hashes, "hash_type": hash_type,
+        "dictionaries": list(dictionaries), "dictionary_cache": dictionary_cache,
+        "offline_index": list(offline_index), "prefilter": prefilter, "threads": threads,
+    }
+    _prepare(opts)
+    workers = workers or os.cpu_count() or 1
+    report = AuditReport()
+    chunks = read_chunks(path, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            report.merge(_audit_chunk(chunk))
+        return report
+
+    import multiprocessing as mp
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("fork" if "fork" in methods else None)
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(opts, workers)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_audit_chunk, (chunk,)))
+            if len(pending) >= 2 * workers:   # backpressure on the reader
+                report.merge(pending.popleft().get())
+        while pending:
+            report.merge(pending.popleft().get())
+    return report
+
+
+def build_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    p = parser or argparse.ArgumentParser(description="Audit a password or SHA-1 / NTLM hash file.")
+    p.add_argument("path", help="input file, one entry per line ('-' for stdin)")
+    p.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    p.add_argument("--chunk-size", type=int, default=5000)
+    p.add_argument("--breach", action="store_true", help="also check entries against HIBP")
+    p.add_argument("--hashes", action="store_true", help="input lines are hex digests")
+    p.add_argument("--hash-type", choices=("sha1", "ntlm"), default="sha1", help="digest type for --hashes")
+    p.add_argument("--dictionary", action="append", default=[], help="extra wordlist (repeatable)")
+    p.add_argument("--dictionary-cache", default=None, help="where to keep the built automaton")
+    p.add_argument("--threads", type=int, default=8, help="concurrent range fetches per worker")
+    p.add_argument("--json", action="store_true", help="print the report as JSON")
+    import breach_checker
+    breach_checker.add_cli_arguments(p)
+    return p
+
+
+def run(args) -> int:
+    if args.breach or args.hashes:
+        import breach_checker
+        err = breach_checker.configure_from_args(args, args.hash_type if args.hashes else "sha1")
+        if err:
+            print(f"audit: {err}", file=sys.stderr)
+            return 2
+    report = audit_file(
+        args.path, workers=args.workers, chunk_size=args.chunk_size,
+        breach=args.breach, hashes=args.hashes, hash_type=args.hash_type,
+        dictionaries=args.dictionary, dictionary_cache=args.dictionary_cache,
+        offline_index=args.offline_index, prefilter=args.prefilter, threads=args.threads,
+    )
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report.format_text())
+    return 1 if report.breach_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(build_parser().parse_args()))
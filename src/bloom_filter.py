@@ -0,0 +1,134 @@
+# bloom_filter.py
+"""
+Memory-mapped Bloom filter over raw password hashes, used as a pre-screen so
+that definitely-not-breached passwords skip the index probe / network call.
+
+Layout (little-endian):
+  header : magic b"PSBCBLM2", k (u32), hash length in bytes (u32; 20 =
+           SHA-1, 16 = NTLM), entries (u64), m_bits (u64),
+           bits_per_entry (f64), target_fp_rate (f64)
+  bits   : ceil(m_bits / 8) bytes
+
+Inputs are already uniformly distributed (SHA-1 / NTLM), so the k probe
+positions come straight from the hash bytes via double hashing. A filter only
+answers for the hash type it was built over; breach_checker refuses to use
+it for the other.
+"""
+from __future__ import annotations
+import math, mmap, os, struct, sys
+from typing import Iterable, Tuple
+
+MAGIC = b"PSBCBLM2"
+HASH_TYPES = {20: "sha1", 16: "ntlm"}  # hash length in bytes -> type
+_HEADER = struct.Struct("<8sIIQQdd")
+_HALVES = struct.Struct("<QQ")
+
+
+def sizing(entries: int, fp_rate: float) -> Tuple[int, int]:
+    """Return (m_bits, k) for the requested false-positive rate."""
+    if not 0 < fp_rate < 1:
+        raise ValueError("fp_rate must be between 0 and 1")
+    n = max(int(entries), 1)
+    m = int(math.ceil(-n * math.log(fp_rate) / (math.log(2) ** 2)))
+    m = (m + 7) // 8 * 8
+    k = max(1, int(round(m / n * math.log(2))))
+    return m, k
+
+
+def _positions(raw: bytes, k: int, m: int):
+    h1, h2 = _HALVES.unpack_from(raw, 0)
+    h2 |= 1
+    for i in range(k):
+        yield (h1 + i * h2) % m
+
+
+def build_filter(hashes: Iterable[bytes], entries: int, out_path: str,
+                 fp_rate: float = 0.01, hash_len: int = 20) -> int:
+    """
+    Write a filter for `entries` raw hashes of `hash_len` bytes (20 = SHA-1,
+    16 = NTLM). Returns the number of hashes added.
+    """
+    if hash_len not in HASH_TYPES:
+        raise ValueError(f"unsupported hash length {hash_len}")
+    m, k = sizing(entries, fp_rate)
+    tmp_path = out_path + ".tmp"
+    added = 0
+    with open(tmp_path, "wb+") as f:
+        f.truncate(_HEADER.size + m // 8)
+        with mmap.mmap(f.fileno(), 0) as mm:
+            base = _HEADER.size
+            for raw in hashes:
+                for pos in _positions(raw, k, m):
+                    mm[base + (pos >> 3)] |= 1 << (pos & 7)
+                added += 1
+            bpe = m / max(added, 1)
+            mm[:_HEADER.size] = _HEADER.pack(MAGIC, k, hash_len, added, m, bpe, fp_rate)
+            mm.flush()
+    os.replace(tmp_path, out_path)
+    return added
+
+
+def build_from_index(index_path: str, out_path: str, fp_rate: float = 0.01) -> int:
+    from offline_index import OfflineIndex
+    with OfflineIndex(index_path) as idx:
+        return build_filter((raw for raw, _ in idx), idx.count, out_path, fp_rate, idx.hash_len)
+
+
+class BloomFilter:
+    """Read-only filter; `might_contain` never returns False for a member."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._f.close()
+            raise
+        if len(self._mm) < _HEADER.size:
+            self.close()
+            raise ValueError(f"not a valid PSBC filter file: {path}")
+        magic, k, hash_len, entries, m, bpe, fp = _HEADER.unpack_from(self._mm, 0)
+        if magic == b"PSBCBLM1":
+            self.close()
+            raise ValueError(f"{path} does not record its hash type; rebuild it with bloom_filter.py")
+        if magic != MAGIC or hash_len not in HASH_TYPES or len(self._mm) != _HEADER.size + m // 8:
+            self.close()
+            raise ValueError(f"not a valid PSBC filter file: {path}")
+        self.hash_len, self.hash_type = hash_len, HASH_TYPES[hash_len]
+        self.k, self.entries, self.m_bits = k, entries, m
+        self.bits_per_entry, self.fp_rate = bpe, fp
+
+    def close(self):
+        try:
+            self._mm.close()
+        except Exception:
+            pass
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def might_contain_raw(self, raw: bytes) -> bool:
+        mm, base = self._mm, _HEADER.size
+        for pos in _positions(raw, self.k, self.m_bits):
+            if not mm[base + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def might_contain(self, hex_hash: str) -> bool:
+        return self.might_contain_raw(bytes.fromhex(hex_hash))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print("usage: python bloom_filter.py <index.idx> <out.bloom> [fp_rate]")
+        sys.exit(2)
+    rate = float(sys.argv[3]) if len(sys.argv) == 4 else 0.01
+    n = build_from_index(sys.argv[1], sys.argv[2], rate)
+    with BloomFilter(sys.argv[2]) as bf:
+        print(f"{n:,} {bf.hash_type} hashes -> {sys.argv[2]} "
+              f"({bf.bits_per_entry:.2f} bits/entry, k={bf.k}, target fp={bf.fp_rate})")
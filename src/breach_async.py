@@ -0,0 +1,273 @@
+# breach_async.py
+"""
+asyncio breach checks over a small pool of keep-alive HTTP/1.1 connections.
+
+One SSL context is created per client and every connection is reused until
+the server closes it, so concurrent checks skip the per-call TCP+TLS
+handshake that breach_checker._fetch_prefix pays.
+"""
+from __future__ import annotations
+import asyncio, ssl, time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import breach_checker as bc
+import metrics
+from range_table import RangeTable
+from resilience import CircuitOpenError
+
+
+class RangeHTTPError(Exception):
+    def __init__(self, status: int, retry_after: Optional[str] = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RangeClient:
+    """
+    Pooled client for the /range/ endpoint. At most `max_connections`
+    requests are in flight; concurrent requests for the same prefix share a
+    single fetch.
+    """
+
+    def __init__(self, base: Optional[str] = None, max_connections: int = 8,
+                 timeout: float = 8.0, ssl_context: Optional[ssl.SSLContext] = None):
+        self.base = base or bc.API_BASE
+        url = urlsplit(self.base)
+        self.host = url.hostname or "localhost"
+        self.use_tls = url.scheme == "https"
+        self.port = url.port or (443 if self.use_tls else 80)
+        self.path = url.path if url.path.endswith("/") else url.path + "/"
+        self.timeout = timeout
+        self._ssl = (ssl_context or ssl.create_default_context()) if self.use_tls else None
+        self._sem = asyncio.Semaphore(max(1, int(max_connections)))
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._closed = False
+        self._host_header = self.host if url.port is None else f"{self.host}:{url.port}"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def close_nowait(self) -> list:
+        """Stop pooling and close idle connections; returns their writers for close() to await."""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        return idle
+
+    async def close(self):
+        for _, writer in self.close_nowait():
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _connect(self):
+        return await asyncio.open_connection(
+            self.host, self.port, ssl=self._ssl,
+            server_hostname=self.host if self._ssl else None,
+        )
+
+    def _request_bytes(self, prefix: str) -> bytes:
+        return (
+            f"GET {self.path}{prefix} HTTP/1.1\r\n"
+            f"Host: {self._host_header}\r\n"
+            f"User-Agent: {bc.USER_AGENT}\r\n"
+            f"Add-Padding: {bc.ADD_PADDING}\r\n"
+            "Accept-Encoding: identity\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("ascii")
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        parts = status_line.decode("latin-1").split(None, 2)
+        status = int(parts[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            headers[k.strip().lower()] = v.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+        return status, headers, body
+
+    async def _roundtrip(self, prefix: str) -> RangeTable:
+        """One request on a pooled connection; the caller holds a `_sem` slot."""
+        for attempt in (0, 1):
+            reused = bool(self._idle)
+            reader, writer = self._idle.pop() if reused else await self._connect()
+            try:
+                writer.write(self._request_bytes(prefix))
+                await writer.drain()
+                status, headers, body = await self._read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused and attempt == 0:
+                    continue  # stale keep-alive socket, retry on a fresh one
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            if self._closed or headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+            if status != 200:
+                raise RangeHTTPError(status, headers.get("retry-after"))
+            return RangeTable.from_text(body.decode("utf-8", errors="ignore"))
+        raise ConnectionError("unreachable")
+
+    async def fetch_range(self, prefix: str) -> RangeTable:
+        start = time.perf_counter() if metrics.ENABLED else None
+        cached = bc._cache_get(prefix)
+        if cached is not None:
+            if start is not None:
+                metrics.observe("breach_lookup_seconds", time.perf_counter() - start, source="cache")
+            return cached
+        fut = self._inflight.get(prefix)
+        if fut is None:
+            fut = asyncio.ensure_future(self._fetch_and_cache(prefix))
+            self._inflight[prefix] = fut
+            fut.add_done_callback(lambda _f, p=prefix: self._inflight.pop(p, None))
+        try:
+            return await asyncio.shield(fut)
+        finally:
+            if start is not None:
+                metrics.observe("breach_lookup_seconds", time.perf_counter() - start, source="network")
+
+    async def _fetch_and_cache(self, prefix: str) -> RangeTable:
+        # same limiter / retry / breaker objects as the sync path
+        attempt = 0
+        while True:
+            try:
+                # queueing for a connection slot is not upstream latency:
+                # only the round-trip itself runs under the timeout
+                async with self._sem:
+                    if not bc._BREAKER.allow():
+                        raise CircuitOpenError(prefix)
+                    delay = bc._LIMITER.reserve()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    bc._count("requests")
+                    table = await asyncio.wait_for(self._roundtrip(prefix), self.timeout)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                retryable, retry_after = bc._classify_failure(e)
+                delay = bc._RETRY.delay(attempt, retry_after) if retryable else None
+                if delay is None:
+                    raise
+                bc._count("retries")
+                if metrics.ENABLED:
+                    metrics.incr("breach_retries_total")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            if metrics.ENABLED:
+                metrics.incr("breach_http_responses_total", status=200)
+            bc._BREAKER.record_success()
+            bc._LIMITER.recover()
+            bc._cache_put(prefix, table)
+            return table
+
+    async def lookup_prefix(self, prefix: str, suffixes: Iterable[str]) -> Dict[str, dict]:
+        suffixes = list(suffixes)
+        if bc._OFFLINE is not None:
+            return bc._lookup_prefix(prefix, suffixes, self.timeout)
+        try:
+            table = await self.fetch_range(prefix)
+        except RangeHTTPError as e:
+            if e.status == 429:
+                err = bc._error(f"rate_limited:{e.retry_after or '2'}")
+            else:
+                err = bc._error("http_error")
+            return {s: dict(err) for s in suffixes}
+        except CircuitOpenError:
+            if metrics.ENABLED:
+                metrics.incr("breach_circuit_rejections_total")
+            return {s: bc._error("circuit_open") for s in suffixes}
+        except Exception:
+            return {s: bc._error("network_error") for s in suffixes}
+        return {s: bc._result(table.count(s)) for s in suffixes}
+
+
+_DEFAULT: Dict[asyncio.AbstractEventLoop, RangeClient] = {}
+
+
+def _default_client() -> RangeClient:
+    loop = asyncio.get_running_loop()
+    client = _DEFAULT.get(loop)
+    if client is None or client.base != bc.API_BASE:  # set_api_base() since it was made
+        if client is not None:
+            client.close_nowait()  # requests still in flight close their sockets when done
+        for old in [l for l in _DEFAULT if l.is_closed()]:
+            del _DEFAULT[old]
+        client = _DEFAULT[loop] = RangeClient()
+    return client
+
+
+async def check_pwned_password_async(password: str, client: Optional[RangeClient] = None) -> dict:
+    """Async twin of breach_checker.check_pwned_password (same result dict)."""
+    if not password:
+        return bc._error("empty_password")
+    full = bc.sha1_hex(password)
+    bloom = bc._prefilter("sha1")
+    if bloom is not None and not bloom.might_contain(full):
+        return bc._result(0)
+    prefix, suffix = full[:5], full[5:]
+    client = client or _default_client()
+    return (await client.lookup_prefix(prefix, (suffix,)))[suffix]
+
+
+async def check_pwned_passwords_async(passwords: Iterable[str], client: Optional[RangeClient] = None
+                                      ) -> AsyncIterator[Tuple[str, dict]]:
+    """Async twin of breach_checker.check_pwned_passwords; yields in completion order."""
+    client = client or _default_client()
+    bloom = bc._prefilter("sha1")
+    groups: Dict[str, Dict[str, List[str]]] = {}
+    seen = set()
+    for pwd in passwords:
+        if pwd in seen:
+            continue
+        seen.add(pwd)
+        if not pwd:
+            yield pwd, bc._error("empty_password")
+            continue
+        full = bc.sha1_hex(pwd)
+        if bloom is not None and not bloom.might_contain(full):
+            yield pwd, bc._result(0)
+            continue
+        groups.setdefault(full[:5], {}).setdefault(full[5:], []).append(pwd)
+
+    async def one(prefix: str):
+        return prefix, await client.lookup_prefix(prefix, groups[prefix])
+
+    for coro in asyncio.as_completed([one(p) for p in groups]):
+        prefix, by_suffix = await coro
+        for sfx, res in by_suffix.items():
+            for pwd in groups[prefix][sfx]:
+                yield pwd, res
@@ -1,58 +1,504 @@
 # breach_checker.py
 from __future__ import annotations
-import hashlib, urllib.request, urllib.error, ssl
-from typing import Dict
+import hashlib, os, threading, time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-API_BASE = "https://api.pwnedpasswords.com/range/"
+import metrics
+from range_table import RangeTable
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, TokenBucket
+
+PUBLIC_API_BASE = "https://api.pwnedpasswords.com/range/"
+
+def _normalize_base(url: Optional[str]) -> str:
+    url = url or PUBLIC_API_BASE
+    return url if url.endswith("/") else url + "/"
+
+API_BASE = _normalize_base(os.environ.get("PSBC_API_BASE"))
+# offline_index.py files (SHA-1 and/or NTLM, os.pathsep-separated) to answer
+# from instead of the API, e.g. for the desktop UI; loaded once the loader is defined
+_ENV_OFFLINE = [p for p in os.environ.get("PSBC_OFFLINE_INDEX", "").split(os.pathsep) if p]
 USER_AGENT = "PasswordStrengthBreachChecker/1.0 (+local)"
 ADD_PADDING = "true"  # privacy hardening
+HASH_HEX_LEN = {"sha1": 40, "ntlm": 32}  # the range API's ?mode=ntlm serves NTLM (MD4) hashes
+
+_CACHE: "OrderedDict[str, Tuple[float, RangeTable, int]]" = OrderedDict()  # prefix -> (fetched, table, nbytes), LRU order
+_MAX_CACHE = 4096                    # entries
+_MAX_CACHE_BYTES = 16 * 1024 * 1024  # ~500 padded ranges per process; the disk tier holds the rest
+_CACHE_BYTES = 0
+_CACHE_TTL = 3600.0
+_CACHE_LOCK = threading.Lock()
+_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+
+_DISK = None  # range_cache.RangeCache when a persistent cache is configured
+
+# urllib/ssl and the CA bundle are loaded on the first online lookup, not at import
+_SSL_CONTEXT = None
+_LIMITER = TokenBucket()
+_RETRY = RetryPolicy()
+_BREAKER = CircuitBreaker()
+_NET_STATS = {"requests": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+_NET_STATS_LOCK = threading.Lock()  # batch lookups update the counters from worker threads
+# interactive checks (the desktop UI) give up rather than sit on a long
+# Retry-After: one quick retry for a transient error, none for a real 429
+INTERACTIVE_RETRY = RetryPolicy(max_retries=1, base=0.25, cap=0.5, max_retry_after=2.0)
+
+_OFFLINE = None  # offline_index.OfflineIndex when offline mode is on
+_OFFLINE_NTLM = None  # same, over an NTLM dump; serves hash_type="ntlm" lookups
+
+def use_offline_index(path: Optional[str]) -> None:
+    """
+    Answer lookups from a local index file instead of the API (None = online
+    for both hash types). An index built over an NTLM dump (16-byte hashes)
+    only serves NTLM lookups and leaves the SHA-1 index in place.
+    """
+    global _OFFLINE, _OFFLINE_NTLM
+    if path:
+        from offline_index import OfflineIndex
+        index = OfflineIndex(path)
+        if index.hash_len == HASH_HEX_LEN["ntlm"] // 2:
+            old, _OFFLINE_NTLM = [_OFFLINE_NTLM], index
+        else:
+            old, _OFFLINE = [_OFFLINE], index
+    else:
+        old, _OFFLINE, _OFFLINE_NTLM = [_OFFLINE, _OFFLINE_NTLM], None, None
+    for index in old:
+        if index is not None:
+            index.close()
+
+def is_offline(hash_type: Optional[str] = None) -> bool:
+    """Whether lookups of `hash_type` (default: either type) are answered from a local index."""
+    if hash_type is None:
+        return _OFFLINE is not None or _OFFLINE_NTLM is not None
+    return (_OFFLINE_NTLM if hash_type == "ntlm" else _OFFLINE) is not None
+
+class _UnreadableIndex:
+    """Holds the SHA-1 slot for a $PSBC_OFFLINE_INDEX file that failed to open:
+    lookups report index_error rather than quietly going online."""
+
+    hash_len = HASH_HEX_LEN["sha1"] // 2
+
+    def __init__(self, path: str, exc: Exception):
+        self.reason = f"{path}: {exc}"
+
+    def lookup(self, hex_hash: str) -> int:
+        raise OSError(self.reason)
+
+    def close(self) -> None:
+        pass
+
+for _path in _ENV_OFFLINE:
+    try:
+        use_offline_index(_path)
+    except (OSError, ValueError) as _exc:
+        _OFFLINE = _UnreadableIndex(_path, _exc)
 
-_CACHE: Dict[str, str] = {}
-_MAX_CACHE = 256
+_FILTER = None  # bloom_filter.BloomFilter pre-screen, optional
+
+def use_prefilter(path: Optional[str]) -> None:
+    """
+    Skip index/API lookups for hashes the filter rules out (None = off). The
+    filter only screens hashes of the type it was built over (see
+    has_prefilter); lookups of the other type go straight to the index/API.
+    """
+    global _FILTER
+    old = _FILTER
+    if path:
+        from bloom_filter import BloomFilter
+        _FILTER = BloomFilter(path)
+    else:
+        _FILTER = None
+    if old is not None:
+        old.close()
+
+def has_prefilter(hash_type: str = "sha1") -> bool:
+    """Whether a prefilter built over `hash_type` hashes is loaded."""
+    return _FILTER is not None and _FILTER.hash_type == hash_type
+
+def _prefilter(hash_type: str = "sha1"):
+    # a filter over the other hash type would rule out every real match
+    bloom = _FILTER
+    return bloom if bloom is not None and bloom.hash_type == hash_type else None
+
+def _ssl_context():
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is None:
+        import ssl
+        with _CACHE_LOCK:
+            if _SSL_CONTEXT is None:
+                _SSL_CONTEXT = ssl.create_default_context()
+    return _SSL_CONTEXT
+
+def warm_up() -> None:
+    """Import the networking stack and load CA certificates ahead of the first check."""
+    import urllib.request
+    _ssl_context()
+
+def set_api_base(url: Optional[str]) -> None:
+    """Send range lookups to `url` (e.g. a local range_server.py); None restores the public API."""
+    global API_BASE
+    API_BASE = _normalize_base(url)
+    _cache_clear()  # ranges from another upstream; disk entries are keyed by base
+
+def _disk_key(prefix: str) -> str:
+    # public-API entries keep the bare prefix, so existing cache files stay valid
+    return prefix if API_BASE == PUBLIC_API_BASE else API_BASE + prefix
 
 def sha1_hex(s: str) -> str:
     return hashlib.sha1(s.encode("utf-8")).hexdigest().upper()
 
-def _fetch_prefix(prefix: str, timeout: float = 8.0) -> str:
-    if prefix in _CACHE:
-        return _CACHE[prefix]
-    req = urllib.request.Request(
-        API_BASE + prefix,
-        headers={"User-Agent": USER_AGENT, "Add-Padding": ADD_PADDING},
-        method="GET",
-    )
-    ctx = ssl.create_default_context()
-    with urllib.request.urlopen(req, timeout=timeout, context=ctx) as resp:
-        text = resp.read().decode("utf-8", errors="ignore")
-    if len(_CACHE) >= _MAX_CACHE:
+def use_disk_cache(path: Optional[str], ttl: float = None, max_bytes: int = None) -> None:
+    """Persist fetched ranges in a sqlite cache at `path` (None = memory only)."""
+    global _DISK
+    old = _DISK
+    if path:
+        import range_cache
+        _DISK = range_cache.RangeCache(
+            path,
+            ttl=range_cache.DEFAULT_TTL if ttl is None else ttl,
+            max_bytes=range_cache.DEFAULT_MAX_BYTES if max_bytes is None else max_bytes,
+        )
+    else:
+        _DISK = None
+    if old is not None:
+        old.close()
+
+def cache_stats() -> dict:
+    with _CACHE_LOCK:
+        stats = {"memory": dict(_CACHE_STATS, entries=len(_CACHE), bytes=_CACHE_BYTES)}
+    if _DISK is not None:
+        stats["disk"] = _DISK.stats()
+    return stats
+
+def _cache_clear() -> None:
+    global _CACHE_BYTES
+    with _CACHE_LOCK:
         _CACHE.clear()
-    _CACHE[prefix] = text
-    return text
+        _CACHE_BYTES = 0
 
-def check_pwned_password(password: str, timeout: float = 8.0) -> dict:
-    """Return dict: {'ok': bool, 'found': bool, 'count': int, 'error': str|None}"""
-    if not password:
-        return {"ok": False, "found": False, "count": 0, "error": "empty_password"}
-    full = sha1_hex(password)
-    prefix, suffix = full[:5], full[5:]
+def _cache_get(prefix: str) -> Optional[RangeTable]:
+    global _CACHE_BYTES
+    now = time.time()
+    with _CACHE_LOCK:
+        entry = _CACHE.get(prefix)
+        if entry is not None and now - entry[0] <= _CACHE_TTL:
+            _CACHE.move_to_end(prefix)
+            _CACHE_STATS["hits"] += 1
+            if metrics.ENABLED:
+                metrics.incr("breach_cache_total", tier="memory", result="hit")
+            return entry[1]
+        if entry is not None:
+            del _CACHE[prefix]
+            _CACHE_BYTES -= entry[2]
+        _CACHE_STATS["misses"] += 1
+    if metrics.ENABLED:
+        metrics.incr("breach_cache_total", tier="memory", result="miss")
+    if _DISK is not None:
+        data = _DISK.get(_disk_key(prefix))
+        if metrics.ENABLED:
+            metrics.incr("breach_cache_total", tier="disk", result="miss" if data is None else "hit")
+        if data is not None:
+            try:
+                table = RangeTable.from_bytes(data)
+            except ValueError:
+                return None  # written by an older format; refetch
+            _cache_put(prefix, table, persist=False)
+            return table
+    return None
+
+def _cache_put(prefix: str, table: RangeTable, persist: bool = True) -> None:
+    global _CACHE_BYTES
+    size = table.nbytes
+    with _CACHE_LOCK:
+        old = _CACHE.pop(prefix, None)
+        if old is not None:
+            _CACHE_BYTES -= old[2]
+        _CACHE[prefix] = (time.time(), table, size)
+        _CACHE_BYTES += size
+        while _CACHE and (len(_CACHE) > _MAX_CACHE or _CACHE_BYTES > _MAX_CACHE_BYTES):
+            _, (_, _, evicted) = _CACHE.popitem(last=False)
+            _CACHE_BYTES -= evicted
+            _CACHE_STATS["evictions"] += 1
+            if metrics.ENABLED:
+                metrics.incr("breach_cache_evictions_total", tier="memory")
+    if persist and _DISK is not None:
+        _DISK.put(_disk_key(prefix), table.to_bytes())
+
+def configure_network(rate: Optional[float] = 50.0, burst: int = 50, max_retries: int = 3,
+                      backoff_base: float = 0.5, backoff_cap: float = 30.0,
+                      failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+    """
+    Tune API flow control: token-bucket `rate` (requests/s, None = unlimited)
+    and `burst`, retry count and jittered backoff bounds, and the number of
+    consecutive failures that opens the circuit for `reset_timeout` seconds.
+    """
+    global _LIMITER, _RETRY, _BREAKER
+    _LIMITER = TokenBucket(rate, burst)
+    _RETRY = RetryPolicy(max_retries, backoff_base, backoff_cap)
+    _BREAKER = CircuitBreaker(failure_threshold, reset_timeout)
+
+def share_rate(parts: int) -> None:
+    """
+    Keep 1/`parts` of the configured request rate and burst in this process.
+    Each forked pool worker inherits a full copy of the token bucket, so a
+    pool of N workers calls this with N to hold the combined rate at --rate.
+    """
+    global _LIMITER
+    if parts > 1 and _LIMITER.max_rate is not None:
+        _LIMITER = TokenBucket(_LIMITER.max_rate / parts, max(1, _LIMITER.burst // parts))
+
+def add_cli_arguments(parser) -> None:
+    """The lookup options shared by every command that checks HIBP (see configure_from_args)."""
+    g = parser.add_argument_group("breach lookups")
+    g.add_argument("--api-base", default=None,
+                   help="range endpoint, e.g. a local range_server.py (default: $PSBC_API_BASE or the public API)")
+    g.add_argument("--offline-index", action="append", default=[],
+                   help="local index built by offline_index.py (SHA-1 or NTLM; repeatable; "
+                        "default: $PSBC_OFFLINE_INDEX)")
+    g.add_argument("--prefilter", default=None, help="Bloom filter built by bloom_filter.py")
+    g.add_argument("--disk-cache", default=None, help="sqlite cache for fetched ranges")
+    g.add_argument("--rate", type=float, default=None, help="max API requests/s (0 = unlimited)")
+
+def configure_from_args(args, hash_type: str = "sha1") -> Optional[str]:
+    """
+    Apply the add_cli_arguments options. Returns an error message when an
+    index or filter cannot be loaded, or was given but none covers
+    `hash_type`, so a run meant to stay offline never falls back to the API.
+    """
+    if args.api_base:
+        set_api_base(args.api_base)
+    try:
+        for path in args.offline_index:
+            use_offline_index(path)
+        if args.prefilter:
+            use_prefilter(args.prefilter)
+    except (OSError, ValueError) as e:
+        return str(e)
+    if args.offline_index and not is_offline(hash_type):
+        return f"no {hash_type} index among --offline-index {', '.join(args.offline_index)}"
+    if args.prefilter and not has_prefilter(hash_type):
+        return f"{args.prefilter} is not a {hash_type} filter"
+    if args.disk_cache:
+        use_disk_cache(args.disk_cache)
+    if args.rate is not None:
+        configure_network(rate=args.rate or None, burst=max(1, int(args.rate or 1)))
+    return None
+
+def _count(stat: str) -> None:
+    with _NET_STATS_LOCK:
+        _NET_STATS[stat] += 1
+
+def network_stats() -> dict:
+    with _NET_STATS_LOCK:
+        counts = dict(_NET_STATS)
+    return dict(
+        counts,
+        rate=_LIMITER.rate,
+        throttled_seconds=round(_LIMITER.waited, 3),
+        circuit=_BREAKER.state,
+        circuit_trips=_BREAKER.trips,
+    )
+
+def _classify_failure(exc: BaseException) -> Tuple[bool, Optional[str]]:
+    """Return (retryable, retry_after) and feed the limiter / breaker."""
+    status = getattr(exc, "status", None) or getattr(exc, "code", None)
+    if metrics.ENABLED:
+        metrics.incr("breach_http_responses_total",
+                     status=status if isinstance(status, int) else type(exc).__name__)
+    if isinstance(status, int):
+        headers = getattr(exc, "headers", None)
+        retry_after = headers.get("Retry-After") if headers else getattr(exc, "retry_after", None)
+        if status == 429:
+            _count("rate_limited")
+            _LIMITER.throttle()
+            _BREAKER.record_success()  # upstream is alive, just busy
+            return True, retry_after
+        if status >= 500:
+            _count("failures")
+            _BREAKER.record_failure()
+            return True, retry_after
+        _BREAKER.record_success()
+        return False, None
+    _count("failures")
+    _BREAKER.record_failure()
+    return True, None
+
+def _download(prefix: str, timeout: float, hash_type: str = "sha1",
+              retry: Optional[RetryPolicy] = None) -> bytes:
+    import urllib.request
+    context = _ssl_context()
+    retry = retry or _RETRY
+    attempt = 0
+    while True:
+        if not _BREAKER.allow():
+            raise CircuitOpenError(prefix)
+        _LIMITER.acquire()
+        _count("requests")
+        req = urllib.request.Request(
+            API_BASE + prefix + ("?mode=ntlm" if hash_type == "ntlm" else ""),
+            headers={"User-Agent": USER_AGENT, "Add-Padding": ADD_PADDING},
+            method="GET",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=timeout, context=context) as resp:
+                body = resp.read()
+        except Exception as e:
+            retryable, retry_after = _classify_failure(e)
+            delay = retry.delay(attempt, retry_after) if retryable else None
+            if delay is None:
+                raise
+            _count("retries")
+            if metrics.ENABLED:
+                metrics.incr("breach_retries_total")
+            time.sleep(delay)
+            attempt += 1
+            continue
+        if metrics.ENABLED:
+            metrics.incr("breach_http_responses_total", status=200)
+        _BREAKER.record_success()
+        _LIMITER.recover()
+        return body
+
+def _fetch_prefix(prefix: str, timeout: float = 8.0, hash_type: str = "sha1",
+                  retry: Optional[RetryPolicy] = None) -> RangeTable:
+    start = time.perf_counter() if metrics.ENABLED else None
+    key = prefix if hash_type == "sha1" else f"{hash_type}:{prefix}"
+    cached = _cache_get(key)
+    if cached is not None:
+        if start is not None:
+            metrics.observe("breach_lookup_seconds", time.perf_counter() - start, source="cache")
+        return cached
     try:
-        blob = _fetch_prefix(prefix, timeout=timeout)
-    except urllib.error.HTTPError as e:
+        body = _download(prefix, timeout, hash_type, retry)
+        table = RangeTable.from_text(body.decode("utf-8", errors="ignore"))
+    finally:
+        if start is not None:
+            metrics.observe("breach_lookup_seconds", time.perf_counter() - start, source="network")
+    _cache_put(key, table)
+    return table
+
+def _result(count: int) -> dict:
+    return {"ok": True, "found": count > 0, "count": count, "error": None}
+
+def _error(code: str) -> dict:
+    return {"ok": False, "found": False, "count": 0, "error": code}
+
+def _lookup_prefix(prefix: str, suffixes: Iterable[str], timeout: float,
+                   hash_type: str = "sha1", retry: Optional[RetryPolicy] = None) -> Dict[str, dict]:
+    """Resolve every suffix under one prefix with a single index probe or range fetch."""
+    index = _OFFLINE_NTLM if hash_type == "ntlm" else _OFFLINE
+    if index is not None:
+        start = time.perf_counter() if metrics.ENABLED else None
+        try:
+            return {s: _result(index.lookup(prefix + s)) for s in suffixes}
+        except Exception:
+            return {s: _error("index_error") for s in suffixes}
+        finally:
+            if start is not None:
+                metrics.observe("breach_lookup_seconds", time.perf_counter() - start, source="offline")
+    from urllib.error import HTTPError
+    try:
+        table = _fetch_prefix(prefix, timeout, hash_type, retry)
+    except HTTPError as e:
         if e.code == 429:
             retry = e.headers.get("Retry-After", "2")
-            return {"ok": False, "found": False, "count": 0, "error": f"rate_limited:{retry}"}
-        return {"ok": False, "found": False, "count": 0, "error": "http_error"}
+            err = _error(f"rate_limited:{retry}")
+        else:
+            err = _error("http_error")
+        return {s: dict(err) for s in suffixes}
+    except CircuitOpenError:
+        if metrics.ENABLED:
+            metrics.incr("breach_circuit_rejections_total")
+        return {s: _error("circuit_open") for s in suffixes}
     except Exception:
-        return {"ok": False, "found": False, "count": 0, "error": "network_error"}
-    count = 0
-    for line in blob.splitlines():
-        if ":" not in line:
+        return {s: _error("network_error") for s in suffixes}
+    return {s: _result(table.count(s)) for s in suffixes}
+
+def check_pwned_password(password: str, timeout: float = 8.0,
+                         retry: Optional[RetryPolicy] = None) -> dict:
+    """
+    Return dict: {'ok': bool, 'found': bool, 'count': int, 'error': str|None}.
+    `retry` overrides the configured policy for this call (INTERACTIVE_RETRY
+    for a user waiting on the answer).
+    """
+    if not password:
+        return _error("empty_password")
+    full = sha1_hex(password)
+    bloom = _prefilter("sha1")
+    if bloom is not None and not bloom.might_contain(full):
+        if metrics.ENABLED:
+            metrics.incr("breach_prefilter_skips_total")
+        return _result(0)
+    prefix, suffix = full[:5], full[5:]
+    return _lookup_prefix(prefix, (suffix,), timeout, retry=retry)[suffix]
+
+def check_pwned_passwords(passwords: Iterable[str], timeout: float = 8.0,
+                          max_workers: int = 8) -> Iterator[Tuple[str, dict]]:
+    """
+    Batch variant of check_pwned_password. Each distinct password is hashed
+    once, candidates are grouped by 5-char prefix so every range is fetched
+    once, and prefixes are resolved on a bounded thread pool. Yields
+    (password, result) pairs as their prefix completes, one per distinct
+    password, in completion order.
+    """
+    bloom = _prefilter("sha1")
+    groups: Dict[str, Dict[str, List[str]]] = {}
+    seen = set()
+    for pwd in passwords:
+        if pwd in seen:
             continue
-        sfx, cnt = line.split(":", 1)
-        if sfx.strip().upper() == suffix:
-            try:
-                count = int(cnt.strip())
-            except Exception:
-                count = 1
-            break
-    return {"ok": True, "found": count > 0, "count": count, "error": None}
+        seen.add(pwd)
+        if not pwd:
+            yield pwd, _error("empty_password")
+            continue
+        full = sha1_hex(pwd)
+        if bloom is not None and not bloom.might_contain(full):
+            if metrics.ENABLED:
+                metrics.incr("breach_prefilter_skips_total")
+            yield pwd, _result(0)
+            continue
+        groups.setdefault(full[:5], {}).setdefault(full[5:], []).append(pwd)
+    yield from _resolve_groups(groups, timeout, max_workers)
+
+def _resolve_groups(groups: Dict[str, Dict[str, List[str]]], timeout: float,
+                    max_workers: int, hash_type: str = "sha1") -> Iterator[Tuple[str, dict]]:
+    if not groups:
+        return
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    workers = max(1, min(int(max_workers), len(groups)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_lookup_prefix, p, list(g), timeout, hash_type): p
+                   for p, g in groups.items()}
+        for fut in as_completed(futures):
+            by_suffix = groups[futures[fut]]
+            for sfx, res in fut.result().items():
+                for key in by_suffix[sfx]:
+                    yield key, res
+
+def check_pwned_hashes(hashes: Iterable[str], timeout: float = 8.0, max_workers: int = 8,
+                       hash_type: str = "sha1") -> Iterator[Tuple[str, dict]]:
+    """
+    Like check_pwned_passwords, but for hex digests that are already
+    computed: SHA-1, or NTLM with hash_type="ntlm" (looked up with the API's
+    ?mode=ntlm or an NTLM offline index). Yields (hash as given, result);
+    malformed input gets error 'invalid_hash'.
+    """
+    hex_len = HASH_HEX_LEN[hash_type]
+    bloom = _prefilter(hash_type)  # never a filter over the other hash type
+    groups: Dict[str, Dict[str, List[str]]] = {}
+    seen = set()
+    for h in hashes:
+        if h in seen:
+            continue
+        seen.add(h)
+        full = h.strip().upper()
+        if len(full) != hex_len or any(c not in "0123456789ABCDEF" for c in full):
+            yield h, _error("invalid_hash")
+            continue
+        if bloom is not None and not bloom.might_contain(full):
+            if metrics.ENABLED:
+                metrics.incr("breach_prefilter_skips_total")
+            yield h, _result(0)
+            continue
+        groups.setdefault(full[:5], {}).setdefault(full[5:], []).append(h)
+    yield from _resolve_groups(groups, timeout, max_workers, hash_type)
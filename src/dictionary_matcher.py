@@ -0,0 +1,228 @@
+# dictionary_matcher.py
+"""
+Aho–Corasick multi-pattern matcher for dictionary checks.
+
+Built once from any number of wordlists, it reports every dictionary word
+inside a password (with positions) in one left-to-right pass, so the cost per
+password depends on the password length, not the dictionary size. Built
+automata can be saved to a cache file keyed on the source files.
+
+Cache layout (little endian; plain arrays, nothing in it is executed):
+    header   <8sI64s6I  magic b"PSBCAHOC", format version, cache key,
+                        node / edge / output / word counts, data bytes,
+                        crc32(rest of file)
+    edges    (nodes + 1) x u32 start offsets, then edge characters and
+             child nodes, one u32 each per edge
+    fail     nodes x u32
+    out      (nodes + 1) x u32 start offsets, then word ids
+    words    (words + 1) x u32 offsets, then the UTF-8 words back to back
+"""
+from __future__ import annotations
+import hashlib, os, struct, sys, zlib
+from array import array
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+_FORMAT_VERSION = 2
+MAGIC = b"PSBCAHOC"
+_HEADER = struct.Struct("<8sI64s6I")
+
+
+def load_wordlist(path: str, min_len: int = 3) -> List[str]:
+    """
+    Read one word per line. Accepts plain lists, EFF-style '11111<TAB>word'
+    lines and 'word:count' lines; '#' starts a comment line.
+    """
+    words = []
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            w = line.split()[-1].split(":", 1)[0].lower()
+            if len(w) >= min_len:
+                words.append(w)
+    return words
+
+
+class Automaton:
+    """
+    Node 0 is the root. `goto[n]` maps a character to the child node,
+    `fail[n]` is the failure link and `out[n]` holds the ids of every word
+    that ends at n (already merged along the failure chain).
+    """
+
+    __slots__ = ("goto", "fail", "out", "words")
+
+    def __init__(self, words: Iterable[str] = (), min_len: int = 3):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[Tuple[int, ...]] = [()]
+        self.words: List[str] = []
+        seen = set()
+        for w in words:
+            w = w.lower()
+            if len(w) < min_len or w in seen:
+                continue
+            seen.add(w)
+            self._insert(w, len(self.words))
+            self.words.append(w)
+        self._link()
+
+    def _insert(self, word: str, wid: int):
+        node = 0
+        goto = self.goto
+        for ch in word:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            node = nxt
+        self.out[node] = self.out[node] + (wid,)
+
+    def _link(self):
+        goto, fail, out = self.goto, self.fail, self.out
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0) if node else 0
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def step(self, node: int, ch: str) -> int:
+        goto, fail = self.goto, self.fail
+        while node and ch not in goto[node]:
+            node = fail[node]
+        return goto[node].get(ch, 0)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield (start, end, word) for every dictionary word inside `text`."""
+        goto, fail, out, words = self.goto, self.fail, self.out, self.words
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for wid in out[node]:
+                w = words[wid]
+                yield i + 1 - len(w), i + 1, w
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        return list(self.iter_matches(text))
+
+    def contains_any(self, text: str) -> bool:
+        for _ in self.iter_matches(text):
+            return True
+        return False
+
+    def save(self, path: str, key: str = "") -> None:
+        edge_start, chars, children = array("I", [0]), array("I"), array("I")
+        for node in self.goto:
+            chars.extend(map(ord, node))
+            children.extend(node.values())
+            edge_start.append(len(chars))
+        out_start, out_ids = array("I", [0]), array("I")
+        for ids in self.out:
+            out_ids.extend(ids)
+            out_start.append(len(out_ids))
+        encoded = [w.encode("utf-8") for w in self.words]
+        word_start = array("I", [0])
+        for w in encoded:
+            word_start.append(word_start[-1] + len(w))
+        arrays = (edge_start, chars, children, array("I", self.fail), out_start, out_ids, word_start)
+        if sys.byteorder != "little":
+            for a in arrays:
+                a.byteswap()
+        body = b"".join(a.tobytes() for a in arrays) + b"".join(encoded)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, _FORMAT_VERSION, key.encode("ascii"), len(self.goto),
+                                 len(chars), len(out_ids), len(encoded), word_start[-1],
+                                 zlib.crc32(body)))
+            f.write(body)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, key: Optional[str] = None) -> "Automaton":
+        """Read a cache written by save(); ValueError if it is stale, foreign or damaged."""
+        with open(path, "rb") as f:
+            raw = f.read()
+        if len(raw) < _HEADER.size:
+            raise ValueError(f"{path}: not an automaton cache")
+        magic, version, stored_key, nodes, edges, outs, n_words, data_len, crc = \
+            _HEADER.unpack_from(raw, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not an automaton cache")
+        if version != _FORMAT_VERSION or (key is not None and key.encode("ascii") != stored_key.rstrip(b"\0")):
+            raise ValueError("automaton cache is stale")
+        sizes = (nodes + 1, edges, edges, nodes, nodes + 1, outs, n_words + 1)
+        if len(raw) != _HEADER.size + 4 * sum(sizes) + data_len or zlib.crc32(raw[_HEADER.size:]) != crc:
+            raise ValueError(f"{path}: checksum mismatch")
+        arrays, pos = [], _HEADER.size
+        for n in sizes:
+            a = array("I")
+            a.frombytes(raw[pos:pos + 4 * n])
+            if sys.byteorder != "little":
+                a.byteswap()
+            arrays.append(a)
+            pos += 4 * n
+        edge_start, chars, children, fail, out_start, out_ids, word_start = arrays
+        if nodes < 1 or (edges and max(children) >= nodes) or (nodes and max(fail) >= nodes) \
+                or (outs and max(out_ids) >= n_words) or word_start[-1] != data_len \
+                or edge_start[-1] != edges or out_start[-1] != outs:
+            raise ValueError(f"{path}: inconsistent automaton cache")
+        data = raw[pos:]
+        self = cls.__new__(cls)
+        self.goto = [dict(zip(map(chr, chars[edge_start[i]:edge_start[i + 1]]),
+                              children[edge_start[i]:edge_start[i + 1]])) for i in range(nodes)]
+        self.fail = fail.tolist()
+        self.out = [tuple(out_ids[out_start[i]:out_start[i + 1]]) for i in range(nodes)]
+        self.words = [data[word_start[i]:word_start[i + 1]].decode("utf-8") for i in range(n_words)]
+        return self
+
+
+def _cache_key(paths: Sequence[str], extra_words: Iterable[str], min_len: int) -> str:
+    h = hashlib.sha256(f"v{_FORMAT_VERSION}:{min_len}".encode())
+    for p in paths:
+        st = os.stat(p)
+        h.update(f"|{os.path.abspath(p)}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    for w in extra_words:
+        h.update(b"\0" + w.encode("utf-8"))
+    return h.hexdigest()
+
+
+def build_cached(paths: Sequence[str], cache_path: Optional[str] = None,
+                 extra_words: Sequence[str] = (), min_len: int = 3) -> Automaton:
+    """
+    Build an automaton over `extra_words` followed by every wordlist in
+    `paths`. When `cache_path` is given the prebuilt automaton is reused as
+    long as the source files are unchanged.
+    """
+    key = _cache_key(paths, extra_words, min_len)
+    if cache_path and os.path.exists(cache_path):
+        try:
+            return Automaton.load(cache_path, key)
+        except Exception:
+            pass
+    def words():
+        yield from extra_words
+        for p in paths:
+            yield from load_wordlist(p, min_len)
+    ac = Automaton(words(), min_len)
+    if cache_path:
+        try:
+            ac.save(cache_path, key)
+        except OSError:
+            pass
+    return ac
@@ -0,0 +1,227 @@
+# guess_estimator.py
+"""
+zxcvbn-style guess estimation.
+
+Takes the pattern matches from patterns.scan_patterns(), prices each one in
+guesses, fills the gaps with brute force over the password's character pool,
+and finds the cheapest way to cover the whole password with a dynamic
+program over (end position, number of segments). Passwords longer than
+MAX_ANALYSED characters are priced as a repeat of their head when they are
+periodic with a period that fits in it, and are otherwise analysed window by
+window, which keeps the work per window bounded; a window that repeats an
+earlier one is priced as a repeat of it rather than as fresh brute force.
+"""
+from __future__ import annotations
+import datetime, math
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from entropy import char_pool_size
+from patterns import KEYBOARD_ROWS, LEET_MAP, PatternMatch, _matcher, scan_patterns
+
+MAX_ANALYSED = 64
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000.0
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10.0
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50.0
+REFERENCE_YEAR = datetime.date.today().year
+MIN_YEAR_SPACE = 20
+KEYBOARD_STARTS = len("".join(KEYBOARD_ROWS))
+MAX_GUESSES = 2.0 ** 1000  # keeps 2**bits representable as a float downstream
+
+_FACTORIAL = [1.0]
+for _i in range(1, MAX_ANALYSED + 2):
+    _FACTORIAL.append(_FACTORIAL[-1] * _i)
+
+
+def _word_rank(word: str) -> int:
+    """
+    Guesses to reach a dictionary word: the dictionary size, the same for
+    every word. Neither COMMON_WORDS nor the loaded lists carry frequencies
+    (the automaton keeps them sorted or in file order), so a position-based
+    rank would price words by the alphabet rather than by popularity.
+    """
+    return len(_matcher().words) or 1
+
+
+@lru_cache(maxsize=4096)
+def _n_choose_up_to(n: int, k: int) -> float:
+    return float(sum(math.comb(n, i) for i in range(1, k + 1)))
+
+
+def _uppercase_variations(word: str) -> float:
+    if word.islower() or not any(c.isalpha() for c in word):
+        return 1.0
+    if word.isupper() or (word[0].isupper() and word[1:].islower()) \
+            or (word[-1].isupper() and word[:-1].islower()):
+        return 2.0
+    upper = sum(1 for c in word if c.isupper())
+    lower = sum(1 for c in word if c.islower())
+    return max(_n_choose_up_to(upper + lower, min(upper, lower)), 1.0)
+
+
+def _leet_variations(original: str) -> float:
+    low = original.lower()
+    subbed = sum(1 for c in low if c in LEET_MAP)
+    plain = sum(1 for c in low if c in set(LEET_MAP.values()))
+    if not subbed:
+        return 1.0
+    if not plain:
+        return 2.0
+    return max(_n_choose_up_to(subbed + plain, min(subbed, plain)), 2.0)
+
+
+def _char_space(c: str) -> int:
+    if c.isdigit():
+        return 10
+    if c.isalpha():
+        return 26
+    return 33
+
+
+def _match_guesses(kind: str, token: str, original: str) -> float:
+    n = len(original)
+    if kind in ("dictionary", "leet"):
+        g = _word_rank(token) * _uppercase_variations(original)
+        if kind == "leet":
+            g *= _leet_variations(original)
+    elif kind == "repeat":
+        g = _char_space(original[0]) * n
+    elif kind == "sequence":
+        first = original[0].lower()
+        base = 4 if first in "a1" else (10 if first.isdigit() else 26)
+        g = base * n
+    elif kind == "keyboard":
+        g = KEYBOARD_STARTS * n * (2 if any(c.isupper() for c in original) else 1)
+    elif kind == "year":
+        g = max(abs(int(original) - REFERENCE_YEAR), MIN_YEAR_SPACE)
+    else:
+        g = 1.0
+    floor = MIN_SUBMATCH_GUESSES_SINGLE_CHAR if n == 1 else MIN_SUBMATCH_GUESSES_MULTI_CHAR
+    return max(float(g), floor)
+
+
+def estimate_guesses(pwd: str, matches: Optional[Sequence[PatternMatch]] = None
+                     ) -> Tuple[float, List[PatternMatch]]:
+    """
+    Return (guesses, decomposition). The decomposition is the cheapest
+    sequence of matches covering the password; brute-force gaps appear as
+    PatternMatch('bruteforce', ...).
+    """
+    n_total = len(pwd)
+    if n_total == 0:
+        return 1.0, []
+    pool = float(max(char_pool_size(pwd), 1))
+    if matches is None:
+        matches = scan_patterns(pwd)
+    if n_total <= MAX_ANALYSED:
+        return _cover(pwd, pool, matches)
+
+    # zxcvbn prices a repeat as base guesses * repeat count
+    for period in range(1, MAX_ANALYSED + 1):
+        if pwd[period:] == pwd[:-period]:
+            g, seq = _cover(pwd[:period], pool, _clip(matches, 0, period))
+            seq.append(PatternMatch("repeat", period, n_total, pwd[period:]))
+            return min(g * n_total / period, MAX_GUESSES), seq
+
+    guesses, seq = 1.0, []
+    seen: Dict[str, int] = {}
+    for ws in range(0, n_total, MAX_ANALYSED):
+        we = min(ws + MAX_ANALYSED, n_total)
+        window = pwd[ws:we]
+        count = seen.get(window, 0)
+        seen[window] = count + 1
+        if count:
+            guesses *= (count + 1) / count
+            seq.append(PatternMatch("repeat", ws, we, window))
+        else:
+            g, sub = _cover(window, pool, _clip(matches, ws, we))
+            guesses *= g
+            seq += [m._replace(start=m.start + ws, end=m.end + ws) for m in sub]
+        if guesses >= MAX_GUESSES:
+            if we < n_total:
+                seq.append(PatternMatch("bruteforce", we, n_total, pwd[we:]))
+            break
+    return min(guesses, MAX_GUESSES), seq
+
+
+_CLIPPABLE = frozenset(("repeat", "sequence", "keyboard"))  # any slice is still a match
+
+
+def _clip(matches: Sequence[PatternMatch], ws: int, we: int) -> List[PatternMatch]:
+    """Matches inside [ws, we), relative to ws; runs crossing an edge are cut to it."""
+    out = []
+    for m in matches:
+        if ws <= m.start and m.end <= we:
+            out.append(m._replace(start=m.start - ws, end=m.end - ws))
+        elif m.kind in _CLIPPABLE and m.start < we and m.end > ws:
+            s, e = max(m.start, ws), min(m.end, we)
+            out.append(PatternMatch(m.kind, s - ws, e - ws, m.token[s - m.start:e - m.start]))
+    return out
+
+
+def _cover(pwd: str, pool: float, matches: Sequence[PatternMatch]
+           ) -> Tuple[float, List[PatternMatch]]:
+    """Cheapest cover of `pwd` (at most MAX_ANALYSED chars) by matches and brute force."""
+    n = len(pwd)
+    by_end: List[List[Tuple[PatternMatch, float]]] = [[] for _ in range(n)]
+    for m in matches:
+        if m.end <= n and m.end > m.start:
+            by_end[m.end - 1].append((m, _match_guesses(m.kind, m.token, pwd[m.start:m.end])))
+
+    # best[k][l] = (g, pi, start, match) for the cheapest cover of pwd[:k+1]
+    # by l segments; match is None when the last segment is brute force.
+    best: List[Dict[int, tuple]] = [{} for _ in range(n)]
+    # bf[l] = (pi, start) for the cheapest cover ending in brute force at k
+    bf: Dict[int, Tuple[float, int]] = {}
+
+    def consider(k: int, l: int, pi: float, start: int, m: Optional[PatternMatch]):
+        g = _FACTORIAL[l] * pi + MIN_GUESSES_BEFORE_GROWING_SEQUENCE ** (l - 1)
+        row = best[k]
+        for other_l, entry in row.items():
+            if other_l <= l and entry[0] <= g:
+                return
+        row[l] = (g, pi, start, m)
+
+    for k in range(n):
+        for m, g in by_end[k]:
+            if m.start > 0:
+                for l, entry in list(best[m.start - 1].items()):
+                    consider(k, l + 1, entry[1] * g, m.start, m)
+            else:
+                consider(k, 1, g, 0, m)
+        # brute force ending at k: extend the previous brute-force run, or
+        # open a new one right after a pattern match
+        new_bf: Dict[int, Tuple[float, int]] = {1: (pool ** (k + 1), 0)}
+        if k:
+            for l, (pi, start) in bf.items():
+                if l > 1 and (l not in new_bf or pi * pool < new_bf[l][0]):
+                    new_bf[l] = (pi * pool, start)
+            for l, entry in best[k - 1].items():
+                if entry[3] is not None:
+                    pi = entry[1] * pool
+                    if l + 1 not in new_bf or pi < new_bf[l + 1][0]:
+                        new_bf[l + 1] = (pi, k)
+        bf = new_bf
+        for l, (pi, start) in bf.items():
+            consider(k, l, pi, start, None)
+
+    last = best[n - 1]
+    l_best = min(last, key=lambda l: last[l][0])
+    guesses = last[l_best][0]
+
+    seq: List[PatternMatch] = []
+    k, l = n - 1, l_best
+    while k >= 0 and l > 0:
+        _, _, start, m = best[k][l]
+        seq.append(m or PatternMatch("bruteforce", start, k + 1, pwd[start:k + 1]))
+        k, l = start - 1, l - 1
+    seq.reverse()
+    return min(guesses, MAX_GUESSES), seq
+
+
+def estimate_guess_bits(pwd: str, matches: Optional[Sequence[PatternMatch]] = None) -> float:
+    """log2 of the estimated guesses, comparable to entropy.estimate_entropy_bits."""
+    if not pwd:
+        return 0.0
+    guesses, _ = estimate_guesses(pwd, matches)
+    return math.log2(max(guesses, 1.0))
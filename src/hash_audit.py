@@ -0,0 +1,199 @@
+# hash_audit.py
+"""
+Breach audit straight from hash dumps -- SHA-1 lists, or NTLM hashes pulled
+from Active Directory / legacy databases -- with no plaintext anywhere.
+
+    python -m psbc hashes ntds.txt --type ntlm --offline-index pwned-ntlm.idx
+    python -m psbc hashes sha1s.txt.gz -o matches.jsonl
+
+Accepted lines: a bare hex digest, 'digest:anything', 'account:digest', or
+pwdump / secretsdump output ('account:rid:lm:nt:::', NT hash taken). Records
+name the account when the line carries one, else the line number.
+
+The whole input is grouped first: each distinct hash is kept once under its
+5-char prefix with the accounts that use it. Each prefix is then resolved
+with exactly one lookup -- a range fetch (?mode=ntlm for NTLM) on a bounded
+thread pool, or an offline index probe in prefix order -- and matches are
+written with their breach counts as their prefix completes, so the cost
+scales with the number of prefixes (at most 2**20), not input rows. With a
+--prefilter over the same hash type, digests the filter rules out are
+reported clean without a lookup.
+"""
+from __future__ import annotations
+import argparse, sys, time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import breach_checker as bc
+from stream_audit import CsvWriter, JsonlWriter, open_lines
+
+HEX = frozenset("0123456789ABCDEF")
+FIELDS = ["line", "account", "count", "error"]
+
+Label = Union[int, str]
+Groups = Dict[str, Dict[str, List[Label]]]
+
+
+def parse_line(line: str, line_no: int, hex_len: int) -> Optional[Tuple[Label, str]]:
+    """(account or line number, upper-case digest), or None if no digest is found."""
+    fields = line.strip().split(":")
+    if len(fields) >= 4 and _is_hash(fields[3], hex_len):
+        return fields[0], fields[3].upper()  # pwdump: account:rid:lm:nt
+    if _is_hash(fields[0], hex_len):
+        return line_no, fields[0].upper()
+    if len(fields) >= 2 and _is_hash(fields[1], hex_len):
+        return fields[0], fields[1].upper()
+    return None
+
+
+def _is_hash(s: str, hex_len: int) -> bool:
+    return len(s) == hex_len and HEX.issuperset(s.upper())
+
+
+class HashGroups:
+    """Distinct digests of a dump, grouped by prefix, with input statistics."""
+
+    def __init__(self, hash_type: str = "sha1"):
+        self.hash_type = hash_type
+        self.hex_len = bc.HASH_HEX_LEN[hash_type]
+        self.groups: Groups = {}
+        self.entries = self.invalid = self.blank = self.distinct = 0
+
+    def add_lines(self, lines: Iterable[str]) -> "HashGroups":
+        groups, hex_len = self.groups, self.hex_len
+        for line_no, line in enumerate(lines, self.entries + self.invalid + self.blank + 1):
+            if not line.strip():
+                self.blank += 1
+                continue
+            parsed = parse_line(line, line_no, hex_len)
+            if parsed is None:
+                self.invalid += 1
+                continue
+            self.entries += 1
+            label, full = parsed
+            by_suffix = groups.get(full[:5])
+            if by_suffix is None:
+                by_suffix = groups[full[:5]] = {}
+            labels = by_suffix.get(full[5:])
+            if labels is None:
+                labels = by_suffix[full[5:]] = []
+                self.distinct += 1
+            labels.append(label)
+        return self
+
+
+def iter_results(hg: HashGroups, timeout: float = 8.0, threads: int = 8
+                 ) -> Iterator[Tuple[str, List[Label], dict]]:
+    """Yield (digest, labels, result) per distinct digest, one lookup per prefix."""
+    groups, hash_type = hg.groups, hg.hash_type
+    bloom = bc._prefilter(hash_type)
+    if bloom is not None:
+        # digests the filter rules out are answered here; prefixes left empty need no lookup
+        kept: Groups = {}
+        for prefix, by_suffix in groups.items():
+            rest = {}
+            for sfx, labels in by_suffix.items():
+                if bloom.might_contain(prefix + sfx):
+                    rest[sfx] = labels
+                else:
+                    yield prefix + sfx, labels, bc._result(0)
+            if rest:
+                kept[prefix] = rest
+        groups = kept
+    if bc.is_offline(hash_type):
+        # index probes are cheaper than handing work to threads; prefix
+        # order walks the mmap front to back
+        for prefix in sorted(groups):
+            by_suffix = groups[prefix]
+            for sfx, res in bc._lookup_prefix(prefix, by_suffix, timeout, hash_type).items():
+                yield prefix + sfx, by_suffix[sfx], res
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    todo = iter(groups.items())
+    window = 4 * max(1, threads)  # bounded, so a million prefixes aren't all queued at once
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+        pending = {}
+        while True:
+            for prefix, by_suffix in todo:
+                pending[pool.submit(bc._lookup_prefix, prefix, list(by_suffix), timeout, hash_type)] = prefix
+                if len(pending) >= window:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                prefix = pending.pop(fut)
+                by_suffix = groups[prefix]
+                for sfx, res in fut.result().items():
+                    yield prefix + sfx, by_suffix[sfx], res
+
+
+def run_audit(path: str, hash_type: str = "sha1", out: str = "-", fmt: str = "jsonl",
+              all_entries: bool = False, include_hash: bool = False,
+              timeout: float = 8.0, threads: int = 8) -> dict:
+    """Write one record per matching (or, with all_entries, every) account; returns a summary."""
+    t0 = time.perf_counter()
+    hg = HashGroups(hash_type).add_lines(open_lines(path))
+    t1 = time.perf_counter()
+    summary = {"entries": hg.entries, "invalid": hg.invalid, "distinct": hg.distinct,
+               "prefixes": len(hg.groups), "breached_entries": 0, "breached_distinct": 0,
+               "errors": 0}
+    fields = FIELDS + (["hash"] if include_hash else [])
+    f = sys.stdout if out == "-" else open(out, "w", encoding="utf-8", newline="")
+    try:
+        writer = CsvWriter(f, fields) if fmt == "csv" else JsonlWriter(f)
+        for digest, labels, res in iter_results(hg, timeout, threads):
+            if res["error"]:
+                summary["errors"] += len(labels)
+            elif res["found"]:
+                summary["breached_entries"] += len(labels)
+                summary["breached_distinct"] += 1
+            elif not all_entries:
+                continue
+            for label in labels:
+                rec = {"line": label} if isinstance(label, int) else {"account": label}
+                rec["count"] = res["count"]
+                if res["error"]:
+                    rec["error"] = res["error"]
+                if include_hash:
+                    rec["hash"] = digest
+                writer.write(rec)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    t2 = time.perf_counter()
+    summary.update(read_seconds=round(t1 - t0, 3), lookup_seconds=round(t2 - t1, 3),
+                   prefixes_per_sec=round(len(hg.groups) / (t2 - t1), 1) if t2 > t1 else None)
+    return summary
+
+
+def build_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    p = parser or argparse.ArgumentParser(description="Check a SHA-1 / NTLM hash dump against HIBP.")
+    p.add_argument("path", help="hash dump ('-' for stdin, .gz accepted)")
+    p.add_argument("--type", dest="hash_type", choices=sorted(bc.HASH_HEX_LEN), default="sha1")
+    p.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    p.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    p.add_argument("--all", action="store_true", help="write every entry, not just matches")
+    p.add_argument("--include-hash", action="store_true", help="copy the digest into each record")
+    p.add_argument("--threads", type=int, default=16, help="concurrent range lookups")
+    p.add_argument("--timeout", type=float, default=8.0)
+    bc.add_cli_arguments(p)
+    return p
+
+
+def run(args) -> int:
+    err = bc.configure_from_args(args, args.hash_type)
+    if err:
+        print(f"psbc hashes: {err}", file=sys.stderr)
+        return 2
+    summary = run_audit(args.path, args.hash_type, args.output, args.format, args.all,
+                        args.include_hash, args.timeout, args.threads)
+    print(f"{summary['entries']:,} hashes ({summary['distinct']:,} distinct, "
+          f"{summary['prefixes']:,} prefixes, {summary['invalid']:,} unparsed): "
+          f"{summary['breached_entries']:,} breached, {summary['errors']:,} lookup errors "
+          f"in {summary['lookup_seconds']}s", file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(build_parser().parse_args()))
@@ -0,0 +1,218 @@
+# metrics.py
+"""
+Optional in-process instrumentation: counters and latency histograms with
+labels, exported as Prometheus text or JSON.
+
+Off by default. Hot paths guard their calls with `if metrics.ENABLED:`, so
+a disabled build pays one module attribute lookup per call site; when on,
+they resolve their keys once with key() and batch updates with record(). Turn it on
+with enable() (or PSBC_METRICS=1 in the environment).
+
+    metrics.enable()
+    ...
+    print(metrics.to_prometheus())
+"""
+from __future__ import annotations
+import json, os, threading, time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+ENABLED = os.environ.get("PSBC_METRICS", "") not in ("", "0")
+PREFIX = "psbc_"
+# seconds; spans per-stage scoring (µs) up to slow network fetches
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+           0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+_LOCK = threading.Lock()
+_COUNTERS: Dict[_Key, float] = {}
+_HISTOGRAMS: Dict[_Key, List] = {}  # key -> [bucket counts..., +Inf count, sum]
+
+
+def enable(on: bool = True) -> None:
+    global ENABLED
+    ENABLED = bool(on)
+
+
+def reset() -> None:
+    with _LOCK:
+        _COUNTERS.clear()
+        _HISTOGRAMS.clear()
+
+
+_KEYS: Dict[tuple, _Key] = {}  # (name, *labels as passed) -> canonical key
+_MAX_KEYS = 10000
+
+
+def _key(name: str, labels: dict) -> _Key:
+    # a call site passes its labels in a fixed order, so the raw items find
+    # the sorted, stringified key without re-sorting on every call
+    raw = (name, *labels.items())
+    k = _KEYS.get(raw)
+    if k is None:
+        k = name, tuple(sorted((n, str(v)) for n, v in labels.items()))
+        if len(_KEYS) < _MAX_KEYS:
+            _KEYS[raw] = k
+    return k
+
+
+def key(name: str, **labels) -> _Key:
+    """Resolve name + labels once, for record() on hot paths."""
+    return _key(name, labels)
+
+
+def incr(name: str, value: float = 1, **labels) -> None:
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _LOCK:
+        h = _HISTOGRAMS.get(key)
+        if h is None:
+            h = _HISTOGRAMS[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        h[bisect_left(BUCKETS, seconds)] += 1
+        h[-1] += seconds
+
+
+def record(observations: Iterable[Tuple[_Key, float]] = (),
+           counts: Iterable[Tuple[_Key, float]] = ()) -> None:
+    """Several observations and counter increments on pre-resolved keys, under one lock."""
+    if not ENABLED:
+        return
+    with _LOCK:
+        for k, seconds in observations:
+            h = _HISTOGRAMS.get(k)
+            if h is None:
+                h = _HISTOGRAMS[k] = [0] * (len(BUCKETS) + 1) + [0.0]
+            h[bisect_left(BUCKETS, seconds)] += 1
+            h[-1] += seconds
+        for k, value in counts:
+            _COUNTERS[k] = _COUNTERS.get(k, 0) + value
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: dict):
+        self.name, self.labels = name, labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NO_TIMER = _NoTimer()
+
+
+def timer(name: str, **labels):
+    """`with metrics.timer("x_seconds", stage="y"):` -- a shared no-op when disabled."""
+    return _Timer(name, labels) if ENABLED else _NO_TIMER
+
+
+# ---- export ----
+
+def snapshot() -> dict:
+    with _LOCK:
+        counters = dict(_COUNTERS)
+        hists = {k: list(v) for k, v in _HISTOGRAMS.items()}
+    out: dict = {"counters": [], "histograms": []}
+    for (name, labels), value in sorted(counters.items()):
+        out["counters"].append({"name": name, "labels": dict(labels), "value": value})
+    for (name, labels), h in sorted(hists.items()):
+        count = sum(h[:-1])
+        out["histograms"].append({
+            "name": name, "labels": dict(labels), "count": count, "sum": h[-1],
+            "buckets": {str(le): c for le, c in zip(BUCKETS + ("+Inf",), _cumulative(h[:-1]))},
+            "p50": _quantile(h, 0.5), "p99": _quantile(h, 0.99),
+        })
+    return out
+
+
+def _cumulative(counts: List[int]) -> List[int]:
+    total, out = 0, []
+    for c in counts:
+        total += c
+        out.append(total)
+    return out
+
+
+def _quantile(h: List, q: float):
+    """Upper bucket bound holding the q-quantile (None when empty or past the last bound)."""
+    counts = h[:-1]
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    for le, cum in zip(BUCKETS, _cumulative(counts)):
+        if cum >= rank:
+            return le
+    return None
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def to_prometheus() -> str:
+    """Prometheus text exposition format (0.0.4)."""
+    with _LOCK:
+        counters = sorted(_COUNTERS.items())
+        hists = sorted((k, list(v)) for k, v in _HISTOGRAMS.items())
+    lines: List[str] = []
+    typed = set()
+    for (name, labels), value in counters:
+        full = PREFIX + name
+        if full not in typed:
+            lines.append(f"# TYPE {full} counter")
+            typed.add(full)
+        lines.append(f"{full}{_labels(labels)} {value}")
+    for (name, labels), h in hists:
+        full = PREFIX + name
+        if full not in typed:
+            lines.append(f"# TYPE {full} histogram")
+            typed.add(full)
+        cum = _cumulative(h[:-1])
+        for le, c in zip(BUCKETS + ("+Inf",), cum):
+            bound = _labels(labels, 'le="%s"' % (le if isinstance(le, str) else format(le, "g")))
+            lines.append(f"{full}_bucket{bound} {c}")
+        lines.append(f"{full}_sum{_labels(labels)} {h[-1]:.9g}")
+        lines.append(f"{full}_count{_labels(labels)} {cum[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def to_json(indent: int = 2) -> str:
+    return json.dumps(snapshot(), indent=indent)
+
+
+def dump(path: str) -> None:
+    """Write the current metrics to `path`: Prometheus text for *.prom, JSON otherwise."""
+    text = to_prometheus() if path.endswith(".prom") else to_json()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
@@ -0,0 +1,162 @@
+# offline_index.py
+"""
+Compact, memory-mapped index over a Pwned Passwords hash dump.
+
+Layout (all integers little-endian):
+  header   : magic b"PSBCIDX1", hash_len (u32), reserved (u32), count (u64)
+  fanout   : 2**20 + 1 u64 record offsets, one bucket per 5-hex-char prefix
+  records  : count * (hash_len bytes of raw hash + u32 count), sorted
+
+The 2**20 fan-out table maps exactly onto the 5-char k-anonymity prefix, so a
+lookup is one table read plus a binary search inside a few-hundred-entry bucket.
+"""
+from __future__ import annotations
+import mmap, os, struct, sys
+from typing import Iterable, Iterator, Tuple
+
+MAGIC = b"PSBCIDX1"
+_HEADER = struct.Struct("<8sIIQ")
+FANOUT_BITS = 20
+FANOUT_SIZE = 1 << FANOUT_BITS
+_FANOUT = struct.Struct("<%dQ" % (FANOUT_SIZE + 1))
+_COUNT = struct.Struct("<I")
+DATA_START = _HEADER.size + _FANOUT.size
+_MAX_COUNT = 0xFFFFFFFF
+
+
+def _bucket(raw: bytes) -> int:
+    # first 20 bits == first 5 hex chars
+    return (raw[0] << 12) | (raw[1] << 4) | (raw[2] >> 4)
+
+
+def _parse_dump(lines: Iterable[str], hash_len: int) -> Iterator[Tuple[bytes, int]]:
+    hex_len = hash_len * 2
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        h, _, cnt = line.partition(":")
+        h = h.strip()
+        if len(h) != hex_len:
+            raise ValueError(f"bad hash length in dump line: {line[:60]!r}")
+        try:
+            n = int(cnt) if cnt else 1
+        except ValueError:
+            n = 1
+        yield bytes.fromhex(h), min(max(n, 0), _MAX_COUNT)
+
+
+def build_index(dump_path: str, out_path: str, hash_len: int = 20) -> int:
+    """
+    Convert a 'HASH:COUNT' dump (as published by HIBP, sorted by hash) into
+    the binary index format. Returns the number of records written.
+    """
+    fanout = [0] * (FANOUT_SIZE + 1)
+    tmp_path = out_path + ".tmp"
+    written = 0
+    prev = b""
+    with open(dump_path, "r", encoding="ascii", errors="ignore") as src, \
+         open(tmp_path, "wb") as out:
+        out.write(b"\0" * DATA_START)
+        buf = []
+        for raw, n in _parse_dump(src, hash_len):
+            if raw <= prev:
+                raise ValueError("dump must be sorted by hash with no duplicates")
+            prev = raw
+            fanout[_bucket(raw) + 1] += 1
+            buf.append(raw + _COUNT.pack(n))
+            written += 1
+            if len(buf) >= 65536:
+                out.write(b"".join(buf)); buf.clear()
+        out.write(b"".join(buf))
+        # counts -> absolute record offsets
+        for i in range(1, FANOUT_SIZE + 1):
+            fanout[i] += fanout[i - 1]
+        out.seek(0)
+        out.write(_HEADER.pack(MAGIC, hash_len, 0, written))
+        out.write(_FANOUT.pack(*fanout))
+    os.replace(tmp_path, out_path)
+    return written
+
+
+class OfflineIndex:
+    """Read-only view over an index file; safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._f.close()
+            raise
+        magic, hash_len, _, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"not a PSBC index file: {path}")
+        self.hash_len = hash_len
+        self.count = count
+        self._rec = hash_len + _COUNT.size
+        if len(self._mm) != DATA_START + count * self._rec:
+            self.close()
+            raise ValueError(f"truncated index file: {path}")
+
+    def close(self):
+        try:
+            self._mm.close()
+        except Exception:
+            pass
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _bounds(self, bucket: int) -> Tuple[int, int]:
+        return struct.unpack_from("<QQ", self._mm, _HEADER.size + bucket * 8)
+
+    def lookup_raw(self, raw: bytes) -> int:
+        """Breach count for a raw hash, 0 if absent."""
+        if len(raw) != self.hash_len:
+            raise ValueError("hash length does not match index")
+        mm, rec, hl = self._mm, self._rec, self.hash_len
+        lo, hi = self._bounds(_bucket(raw))
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            off = DATA_START + mid * rec
+            key = mm[off:off + hl]
+            if key < raw:
+                lo = mid + 1
+            elif key > raw:
+                hi = mid
+            else:
+                return _COUNT.unpack_from(mm, off + hl)[0]
+        return 0
+
+    def lookup(self, hex_hash: str) -> int:
+        return self.lookup_raw(bytes.fromhex(hex_hash))
+
+    def iter_prefix(self, prefix: str) -> Iterator[Tuple[str, int]]:
+        """Yield (SUFFIX, count) for a 5-char prefix, like a /range/ response."""
+        mm, rec, hl = self._mm, self._rec, self.hash_len
+        lo, hi = self._bounds(int(prefix, 16))
+        for i in range(lo, hi):
+            off = DATA_START + i * rec
+            yield mm[off:off + hl].hex().upper()[5:], _COUNT.unpack_from(mm, off + hl)[0]
+
+    def __iter__(self) -> Iterator[Tuple[bytes, int]]:
+        mm, rec, hl = self._mm, self._rec, self.hash_len
+        for i in range(self.count):
+            off = DATA_START + i * rec
+            yield mm[off:off + hl], _COUNT.unpack_from(mm, off + hl)[0]
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--ntlm"]
+    if len(args) != 2:
+        print("usage: python offline_index.py [--ntlm] <pwned-passwords-{sha1|ntlm}.txt> <out.idx>")
+        sys.exit(2)
+    n = build_index(args[0], args[1], hash_len=16 if "--ntlm" in sys.argv else 20)
+    print(f"indexed {n:,} hashes -> {args[1]}")
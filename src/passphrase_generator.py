@@ -1,7 +1,10 @@
 # passphrase_generator.py
 import secrets, math, os, sys
+from functools import lru_cache
 from pathlib import Path
 
+from random_source import RandomBuffer
+
 # --- helper for PyInstaller bundled files ---
 def resource_path(*parts):
     base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
@@ -18,32 +21,62 @@ SYMBOLS = "!@#$%^&*?-_=+."
 # updated paths: first check bundled, then fallback
 WORDLIST_PATHS = [
     Path(resource_path("data", "eff_large_wordlist.txt")),
+    Path(resource_path("..", "data", "eff_large_wordlist.txt")),  # running from a source checkout
     Path("data/eff_large_wordlist.txt"),
     Path("eff_large_wordlist.txt"),
 ]
 
+BLOB_PATHS = [p.with_suffix(".bin") for p in WORDLIST_PATHS]  # built by wordlist_blob.py
+
+def parse_wordlist(lines):
+    words = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        w = line.split()[-1].lower()  # accept '11111 aardvark' or 'aardvark'
+        # allow letters, hyphen, apostrophe
+        if all(ch.isalpha() or ch in "-'" for ch in w):
+            words.append(w)
+    return words
+
 def _load_words():
+    # the precompiled blob needs no parsing; the text list is the fallback,
+    # and wins when it has changed since its blob was built
+    for p in BLOB_PATHS:
+        if p.exists():
+            try:
+                from wordlist_blob import WordBlob
+                words = WordBlob(str(p), str(p.with_suffix(".txt")))
+            except (OSError, ValueError):
+                continue
+            if len(words):
+                return words
     for p in WORDLIST_PATHS:
         if p.exists():
-            words = []
             with p.open("r", encoding="utf-8", errors="ignore") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    w = line.split()[-1].lower()  # accept '11111 aardvark' or 'aardvark'
-                    # allow letters, hyphen, apostrophe
-                    if all(ch.isalpha() or ch in "-'" for ch in w):
-                        words.append(w)
+                words = parse_wordlist(f)
             if words:
                 return words
     return FALLBACK_WORDLIST
 
-_WORDS = _load_words()
+_LOADED = None
+
+def _words():
+    """The wordlist, loaded on first use."""
+    global _LOADED
+    if _LOADED is None:
+        _LOADED = _load_words()
+    return _LOADED
+
+def __getattr__(name):
+    if name == "_WORDS":  # kept for callers that read the list directly
+        return _words()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def generate_passphrase(num_words=4, separator="-", capitalize=False, add_number=False, add_symbol=False):
     k = max(3, int(num_words))
-    words = [secrets.choice(_WORDS) for _ in range(k)]
+    words = [secrets.choice(_words()) for _ in range(k)]
     if capitalize:
         words = [w.capitalize() for w in words]
     phrase = separator.join(words)
@@ -53,13 +86,92 @@ def generate_passphrase(num_words=4, separator="-", capitalize=False, add_number
         phrase += separator + secrets.choice(SYMBOLS)
     return phrase
 
-def estimate_entropy_bits(num_words, add_number=False, add_symbol=False, wordlist_size=None):
-    n = int(wordlist_size) if wordlist_size else len(_WORDS)
+@lru_cache(maxsize=32)
+def _filtered(min_len=None, max_len=None, exclude=frozenset()):
+    words = dict.fromkeys(
+        w for w in _words()
+        if (min_len is None or len(w) >= min_len)
+        and (max_len is None or len(w) <= max_len)
+        and w not in exclude
+    )
+    return tuple(words)
+
+def filter_words(min_len=None, max_len=None, exclude=()):
+    """The distinct words allowed by a policy (length bounds, excluded words)."""
+    return _filtered(min_len, max_len, frozenset(w.lower() for w in exclude))
+
+def _word_bits(n, k, no_repeat):
+    if no_repeat:
+        return sum(math.log2(n - i) for i in range(k))  # log2(n! / (n-k)!)
+    return k * math.log2(n)
+
+def estimate_entropy_bits(num_words, add_number=False, add_symbol=False, wordlist_size=None,
+                          min_word_len=None, max_word_len=None, exclude=(), no_repeat=False):
+    """Exact entropy of a passphrase drawn under the given policy."""
+    if wordlist_size:
+        n = int(wordlist_size)
+    else:
+        n = len(filter_words(min_word_len, max_word_len, exclude))
     k = max(3, int(num_words))
-    bits = k * math.log2(n)
+    if n < 1 or (no_repeat and k > n):
+        return 0.0
+    bits = _word_bits(n, k, no_repeat)
     if add_number: bits += math.log2(10)
     if add_symbol: bits += math.log2(len(SYMBOLS))
     return round(bits, 2)
 
-def get_wordlist_size():
-    return len(_WORDS)
+def generate_passphrases(n, num_words=4, separator="-", capitalize=False, add_number=False,
+                         add_symbol=False, min_word_len=None, max_word_len=None, exclude=(),
+                         no_repeat=False, min_entropy=None, source=None):
+    """
+    Yield `n` passphrases from one buffered random source. Word indices are
+    drawn with rejection sampling (13 bits at a time for the 7776-word list),
+    so every word of the filtered list is equally likely. With no_repeat,
+    the words of each phrase come from a partial Fisher-Yates shuffle, which
+    is uniform over phrases of distinct words and takes exactly k draws
+    however close k is to the list size. Raises ValueError up front if the
+    policy cannot be met (too few words left, or below min_entropy).
+    """
+    words = filter_words(min_word_len, max_word_len, exclude)
+    k = max(3, int(num_words))
+    if not words:
+        raise ValueError("no words left after applying the policy")
+    if no_repeat and k > len(words):
+        raise ValueError(f"only {len(words)} words available for {k} distinct words")
+    bits = estimate_entropy_bits(k, add_number, add_symbol, min_word_len=min_word_len,
+                                 max_word_len=max_word_len, exclude=exclude, no_repeat=no_repeat)
+    if min_entropy is not None and bits < min_entropy:
+        raise ValueError(f"policy gives {bits} bits, below the required {min_entropy}")
+    if capitalize:
+        words = tuple(w.capitalize() for w in words)
+    source = source or RandomBuffer()
+    per_block = max(1, 4096 // k)
+
+    pool = list(range(len(words))) if no_repeat else None
+    made = 0
+    while made < n:
+        m = min(n - made, per_block)
+        idx = None if no_repeat else source.below_many(len(words), m * k)
+        digits = source.below_many(10, m) if add_number else None
+        symbols = source.below_many(len(SYMBOLS), m) if add_symbol else None
+        for j in range(m):
+            if no_repeat:
+                # partial Fisher-Yates; `pool` stays a permutation between phrases
+                for i in range(k):
+                    r = i + source.below(len(pool) - i)
+                    pool[i], pool[r] = pool[r], pool[i]
+                picked = pool[:k]
+            else:
+                picked = idx[j * k:(j + 1) * k]
+            parts = [words[i] for i in picked]
+            if add_number:
+                parts.append(str(digits[j]))
+            if add_symbol:
+                parts.append(SYMBOLS[symbols[j]])
+            yield separator.join(parts)
+            made += 1
+
+def get_wordlist_size(min_word_len=None, max_word_len=None, exclude=()):
+    if min_word_len is None and max_word_len is None and not exclude:
+        return len(_words())
+    return len(filter_words(min_word_len, max_word_len, exclude))
@@ -1,6 +1,9 @@
+import math
 import string
 import secrets
 
+from random_source import RandomBuffer
+
 def generate_password(length: int = 16, include_symbols: bool = True) -> str:
     """
     Crypto-strong generator using secrets.
@@ -29,3 +32,107 @@ def generate_password(length: int = 16, include_symbols: bool = True) -> str:
         pwd_list[i], pwd_list[j] = pwd_list[j], pwd_list[i]
 
     return "".join(pwd_list)
+
+def generate_passwords(n: int, length: int = 16, include_symbols: bool = True, source=None):
+    """
+    Yield `n` passwords from one buffered random source.
+    Characters are drawn uniformly from the whole pool in large blocks and any
+    password missing a required class is rejected, so every result is uniform
+    over all passwords that satisfy the policy (no shuffle needed).
+    """
+    if length < 8:
+        length = 8
+    classes = [string.ascii_lowercase, string.ascii_uppercase, string.digits]
+    if include_symbols:
+        classes.append(string.punctuation)
+    alphabet = "".join(classes).encode("ascii")
+    required = [frozenset(c) for c in classes]
+    source = source or RandomBuffer()
+    per_block = max(1, (1 << 16) // length)
+
+    made = 0
+    while made < n:
+        blob = source.choices(alphabet, min(n - made, per_block) * length).decode("ascii")
+        for i in range(0, len(blob), length):
+            pwd = blob[i:i + length]
+            chars = set(pwd)
+            for members in required:
+                if members.isdisjoint(chars):
+                    break
+            else:
+                yield pwd
+                made += 1
+                if made == n:
+                    return
+
+def password_entropy_bits(length: int = 16, include_symbols: bool = True) -> float:
+    """
+    Exact entropy of generate_passwords output: log2 of the number of
+    passwords of this length that contain every required class (inclusion–
+    exclusion over the classes that could be missing).
+    """
+    if length < 8:
+        length = 8
+    sizes = [26, 26, 10] + ([len(string.punctuation)] if include_symbols else [])
+    pool = sum(sizes)
+    total = 0
+    for missing in range(1 << len(sizes)):
+        left = pool - sum(size for i, size in enumerate(sizes) if missing >> i & 1)
+        total += (-1) ** bin(missing).count("1") * left ** length
+    return round(math.log2(total), 2)
+
+def chi_square_z(counts) -> float:
+    """
+    Uniformity check for observed counts: the chi-square statistic against equal
+    expected counts, turned into an approximate standard normal z-score
+    (Wilson–Hilferty). |z| above ~4 means the counts are not uniform.
+    """
+    counts = list(counts)
+    k = len(counts)
+    total = sum(counts)
+    if k < 2 or not total:
+        return 0.0
+    expected = total / k
+    stat = sum((c - expected) ** 2 for c in counts) / expected
+    df = k - 1
+    return ((stat / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+
+
+if __name__ == "__main__":
+    import argparse, time
+    from collections import Counter
+
+    ap = argparse.ArgumentParser(description="Bulk generation timing and uniformity check.")
+    ap.add_argument("-n", type=int, default=200000)
+    ap.add_argument("--length", type=int, default=16)
+    ap.add_argument("--no-symbols", action="store_true")
+    args = ap.parse_args()
+    symbols = not args.no_symbols
+
+    t = time.perf_counter()
+    pwds = list(generate_passwords(args.n, args.length, symbols))
+    bulk = time.perf_counter() - t
+    m = max(1, args.n // 20)
+    t = time.perf_counter()
+    for _ in range(m):
+        generate_password(args.length, symbols)
+    single = (time.perf_counter() - t) / m * args.n
+    print(f"generate_passwords: {args.n / bulk:,.0f}/s  "
+          f"(generate_password: {args.n / single:,.0f}/s, {single / bulk:.1f}x)")
+
+    # within each class every character must be equally likely, at every position
+    counts = Counter(c for p in pwds for c in p)
+    classes = [string.ascii_lowercase, string.ascii_uppercase, string.digits]
+    if symbols:
+        classes.append(string.punctuation)
+    worst = 0.0
+    for members in classes:
+        z = chi_square_z(counts[c] for c in members)
+        worst = max(worst, abs(z))
+        print(f"  {members[:10]}…  chi-square z = {z:+.2f}")
+    for pos in (0, args.length - 1):
+        z = chi_square_z(Counter(p[pos] for p in pwds if p[pos] in classes[0])[c] for c in classes[0])
+        worst = max(worst, abs(z))
+        print(f"  position {pos} (lowercase)  chi-square z = {z:+.2f}")
+    print("uniformity:", "ok" if worst < 4 else "FAILED")
+    raise SystemExit(0 if worst < 4 else 1)
@@ -1,4 +1,5 @@
 import re
+from typing import List, NamedTuple
 
 COMMON_WORDS = {
     "password","admin","welcome","letmein","dragon","monkey",
@@ -13,17 +14,26 @@ KEYBOARD_ROWS = [
     "zxcvbnm"
 ]
 
+LEET_MAP = {
+    "@": "a", "4": "a",
+    "0": "o",
+    "1": "l",
+    "!": "i",
+    "$": "s", "5": "s",
+    "3": "e",
+    "7": "t"
+}
+_LEET_TABLE = str.maketrans(LEET_MAP)
+
+# key -> the key to its right on the same row, e.g. 'q' -> 'w'
+_NEXT_KEY = {row[i]: row[i + 1] for row in KEYBOARD_ROWS for i in range(len(row) - 1)}
+_KEYBOARD_CHARS = frozenset("".join(KEYBOARD_ROWS))
+_KEYBOARD_SEQS = tuple(row[i:i + 4] for row in KEYBOARD_ROWS for i in range(len(row) - 3))
+_YEAR_RE = re.compile(r"(20[1-3]\d)")
+_NON_KEY_RE = re.compile(r"[^a-z0-9]")
+
 def leet_normalize(s: str) -> str:
-    table = str.maketrans({
-        "@": "a", "4": "a",
-        "0": "o",
-        "1": "l",
-        "!": "i",
-        "$": "s", "5": "s",
-        "3": "e",
-        "7": "t"
-    })
-    return s.lower().translate(table)
+    return s.lower().translate(_LEET_TABLE)
 
 def has_repeated_runs(s: str, run_len: int = 3) -> bool:
     return re.search(r"(.)\1{" + str(run_len-1) + r",}", s) is not None
@@ -39,9 +49,11 @@ def has_simple_sequence(s: str, min_len: int = 4) -> bool:
     return False
 
 def has_keyboard_walk(s: str, min_len: int = 4) -> bool:
-    lower = re.sub(r"[^a-z0-9]", "", s.lower())
+    lower = _NON_KEY_RE.sub("", s.lower())
     if len(lower) < min_len:
         return False
+    if min_len == 4:
+        return any(seq in lower for seq in _KEYBOARD_SEQS)
     for row in KEYBOARD_ROWS:
         for i in range(len(row) - min_len + 1):
             seq = row[i:i+min_len]
@@ -50,13 +62,164 @@ def has_keyboard_walk(s: str, min_len: int = 4) -> bool:
     return False
 
 def contains_year(s: str, start=2010, end=2030) -> bool:
-    m = re.search(r"(20[1-3]\d)", s)
+    m = _YEAR_RE.search(s)
     return bool(m and start <= int(m.group(1)) <= end)
 
-def contains_common_word_or_leet(s: str) -> bool:
+# Aho–Corasick automaton over COMMON_WORDS plus any loaded dictionaries;
+# built lazily on first use.
+_MATCHER = None
+
+def use_dictionaries(paths=(), cache_path=None, min_len: int = 4):
+    """
+    Extend common-word detection with wordlist files (one word per line, EFF
+    lists accepted). With `cache_path` the built automaton is kept on disk
+    and reused while the files are unchanged.
+    """
+    global _MATCHER
+    from dictionary_matcher import build_cached
+    _MATCHER = build_cached(list(paths), cache_path, sorted(COMMON_WORDS), min_len)
+    return _MATCHER
+
+def _matcher():
+    global _MATCHER
+    if _MATCHER is None:
+        from dictionary_matcher import Automaton
+        _MATCHER = Automaton(sorted(COMMON_WORDS), min_len=1)
+    return _MATCHER
+
+def find_dictionary_words(s: str):
+    """Return (start, end, word, is_leet) for every dictionary hit, plain first."""
+    m = _matcher()
     plain = s.lower()
-    leet  = leet_normalize(s)
-    for w in COMMON_WORDS:
-        if w in plain or w in leet:
-            return True
-    return False
+    hits = [(i, j, w, False) for i, j, w in m.iter_matches(plain)]
+    leet = leet_normalize(s)
+    if leet != plain:
+        found = {(i, j) for i, j, _, _ in hits}
+        hits += [(i, j, w, True) for i, j, w in m.iter_matches(leet) if (i, j) not in found]
+    return hits
+
+def contains_common_word_or_leet(s: str) -> bool:
+    m = _matcher()
+    if m.contains_any(s.lower()):
+        return True
+    leet = leet_normalize(s)
+    return leet != s.lower() and m.contains_any(leet)
+
+
+# ---- single-pass scanner ----
+
+REPEAT_MIN, SEQUENCE_MIN, KEYBOARD_MIN = 3, 4, 4
+YEAR_MIN, YEAR_MAX = 2010, 2030
+
+class PatternMatch(NamedTuple):
+    kind: str    # repeat | sequence | keyboard | year | dictionary | leet
+    start: int
+    end: int     # exclusive
+    token: str
+
+class PatternScanner:
+    """
+    Walks a password once, tracking every detector's state side by side.
+    Feeding is incremental: copy() a scanner that has seen a prefix and
+    feed() only the new tail.
+    """
+
+    __slots__ = ("text", "closed", "_ac", "_prev", "_prev_low",
+                 "_rep_start", "_seq_start", "_kb_start", "_kb_end", "_kb_len",
+                 "_kb_prev", "_ac_plain", "_ac_leet", "_plain_spans")
+
+    def __init__(self):
+        self.text = ""
+        self.closed: List[PatternMatch] = []
+        self._ac = _matcher()
+        self._prev = self._prev_low = self._kb_prev = None
+        self._rep_start = self._seq_start = self._kb_start = self._kb_end = 0
+        self._kb_len = 0
+        self._ac_plain = self._ac_leet = 0
+        self._plain_spans = set()
+
+    def copy(self) -> "PatternScanner":
+        other = PatternScanner.__new__(PatternScanner)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.closed = list(self.closed)
+        other._plain_spans = set(self._plain_spans)
+        return other
+
+    def _close_repeat(self, i):
+        if i - self._rep_start >= REPEAT_MIN:
+            self.closed.append(PatternMatch("repeat", self._rep_start, i, self.text[self._rep_start:i]))
+
+    def _close_sequence(self, i):
+        if i - self._seq_start >= SEQUENCE_MIN:
+            self.closed.append(PatternMatch("sequence", self._seq_start, i, self.text[self._seq_start:i]))
+
+    def _close_keyboard(self):
+        if self._kb_len >= KEYBOARD_MIN:
+            self.closed.append(PatternMatch("keyboard", self._kb_start, self._kb_end,
+                                            self.text[self._kb_start:self._kb_end]))
+
+    def feed(self, chunk: str) -> "PatternScanner":
+        ac = self._ac
+        out, words = ac.out, ac.words
+        closed = self.closed
+        base = len(self.text)
+        self.text += chunk
+        text = self.text
+        for i in range(base, len(text)):
+            c = text[i]
+            low = c.lower()
+            if len(low) != 1:
+                low = c
+
+            # repeats are case-sensitive, e.g. 'aaa' but not 'aAa'
+            if c != self._prev:
+                self._close_repeat(i)
+                self._rep_start = i
+            # ascending runs, e.g. 'abcd', '1234'
+            if self._prev_low is None or ord(low) - ord(self._prev_low) != 1:
+                self._close_sequence(i)
+                self._seq_start = i
+            # keyboard rows; non-key characters are skipped, not breaking a walk
+            if low in _KEYBOARD_CHARS:
+                if self._kb_prev is not None and _NEXT_KEY.get(self._kb_prev) == low:
+                    self._kb_len += 1
+                else:
+                    self._close_keyboard()
+                    self._kb_start, self._kb_len = i, 1
+                self._kb_end = i + 1
+                self._kb_prev = low
+            # years 2010..2030
+            if i >= 3 and text[i - 3] == "2" and text[i - 2] == "0" and "1" <= text[i - 1] <= "3" \
+                    and "0" <= c <= "9" and YEAR_MIN <= int(text[i - 3:i + 1]) <= YEAR_MAX:
+                closed.append(PatternMatch("year", i - 3, i + 1, text[i - 3:i + 1]))
+            # dictionary words, plain and leet-normalised, in the same step
+            self._ac_plain = node = ac.step(self._ac_plain, low)
+            for wid in out[node]:
+                w = words[wid]
+                self._plain_spans.add((i + 1 - len(w), i + 1))
+                closed.append(PatternMatch("dictionary", i + 1 - len(w), i + 1, w))
+            leet = LEET_MAP.get(low, low)
+            self._ac_leet = node = ac.step(self._ac_leet, leet)
+            if leet != low or node != self._ac_plain:
+                for wid in out[node]:
+                    w = words[wid]
+                    span = (i + 1 - len(w), i + 1)
+                    if span not in self._plain_spans:
+                        closed.append(PatternMatch("leet", span[0], span[1], w))
+
+            self._prev, self._prev_low = c, low
+        return self
+
+    def matches(self) -> List[PatternMatch]:
+        """Every match so far, including runs still open at the end of the text."""
+        tail = PatternScanner.copy(self)
+        n = len(self.text)
+        tail._close_repeat(n)
+        tail._close_sequence(n)
+        tail._close_keyboard()
+        return tail.closed
+
+def scan_patterns(s: str) -> List[PatternMatch]:
+    """All pattern matches in `s` with spans, from a single pass."""
+    return PatternScanner().feed(s).matches()
@@ -0,0 +1,205 @@
+# psbc.py
+"""
+Headless command line for servers and pipelines (no Tk needed):
+
+    python -m psbc score    passwords.txt [-j 4] [--format csv] [--breach]
+    python -m psbc check    passwords.txt [--hashes [--hash-type ntlm]] [--threads 16] [--offline-index hibp.idx]
+    python -m psbc hashes   ntds.txt --type ntlm [--offline-index pwned-ntlm.idx]   (matches only)
+    python -m psbc generate [-n 1000] [--length 20] [--passphrase --words 5] [--json]
+    python -m psbc audit    passwords.txt [-j 4] [--json]
+    python -m psbc serve    [--port 8080] [-j 2]
+
+Inputs are files ('-' for stdin, .gz accepted where noted); results go to
+stdout (or -o) as JSONL or CSV, one record per input line, in input order.
+Plaintext passwords are only written when --include-password is given.
+`psbc --metrics run.prom <command> ...` records per-stage timings and breach
+counters (see metrics.py) and writes them on exit (JSON unless *.prom).
+"""
+from __future__ import annotations
+import argparse, json, os, sys
+from functools import partial
+from itertools import chain, islice
+from typing import List, Optional
+
+CHECK_FIELDS = ["line", "breached", "breach_count", "error"]
+
+
+# ---- check ----
+
+def run_check(args) -> int:
+    import breach_checker
+    from stream_audit import CsvWriter, JsonlWriter, open_lines
+    err = breach_checker.configure_from_args(args, args.hash_type if args.hashes else "sha1")
+    if err:
+        print(f"psbc check: {err}", file=sys.stderr)
+        return 2
+    if args.hashes:
+        check = partial(breach_checker.check_pwned_hashes, hash_type=args.hash_type)
+    else:
+        check = breach_checker.check_pwned_passwords
+    fields = CHECK_FIELDS + (["password"] if args.include_password else [])
+
+    f = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        writer = CsvWriter(f, fields) if args.format == "csv" else JsonlWriter(f)
+        lines = open_lines(args.path)
+        line_no = errors = 0
+        while True:
+            # one batch at a time keeps memory bounded and output in input order
+            batch: List[str] = list(islice(lines, args.batch_size))
+            if not batch:
+                break
+            items = [x.strip() for x in batch] if args.hashes else batch
+            results = dict(check([x for x in items if x], timeout=args.timeout,
+                                 max_workers=args.threads))
+            for item in items:
+                line_no += 1
+                if not item:
+                    continue
+                res = results[item]
+                errors += res["error"] not in (None, "invalid_hash")  # bad input is not a lookup error
+                rec = {"line": line_no, "breached": res["found"],
+                       "breach_count": res["count"], "error": res["error"]}
+                if args.include_password:
+                    rec["password"] = item
+                writer.write(rec)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    if errors:
+        # same contract as `psbc hashes`: records are complete, the verdict is not
+        print(f"psbc check: {errors:,} lookup errors", file=sys.stderr)
+        return 1
+    return 0
+
+
+# ---- generate ----
+
+def run_generate(args) -> int:
+    if args.passphrase:
+        import passphrase_generator as pgen
+        policy = dict(min_word_len=args.min_word_len, max_word_len=args.max_word_len,
+                      exclude=tuple(args.exclude), no_repeat=args.no_repeat)
+        it = pgen.generate_passphrases(
+            args.count, args.words, args.separator, args.capitalize, args.number,
+            args.symbol, min_entropy=args.min_entropy, **policy)
+        try:
+            first = next(it, None)  # policy errors surface before any output
+        except ValueError as e:
+            print(f"psbc generate: {e}", file=sys.stderr)
+            return 2
+        it = chain([first] if first is not None else [], it)
+        bits = pgen.estimate_entropy_bits(args.words, args.number, args.symbol, **policy)
+    else:
+        from password_generator import generate_passwords, password_entropy_bits
+        it = generate_passwords(args.count, args.length, not args.no_symbols)
+        bits = password_entropy_bits(args.length, not args.no_symbols)
+
+    out = sys.stdout
+    for secret in it:
+        if args.json:
+            out.write(json.dumps({"password": secret, "entropy_bits": bits}) + "\n")
+        else:
+            out.write(secret + "\n")
+    return 0
+
+
+# ---- parser ----
+
+def build_parser(serve: bool = True) -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="psbc", description="Password Strength & Breach Checker (headless).")
+    p.add_argument("--metrics", metavar="PATH", default=None,
+                   help="write timings / counters here on exit (.prom = Prometheus text, else JSON)")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    import audit, breach_checker, stream_audit
+    sp = sub.add_parser("score", help="score passwords (stream to JSONL/CSV)",
+                        description="Score every line of a password file.")
+    stream_audit.build_parser(sp)
+    sp.set_defaults(func=stream_audit.run)
+
+    sp = sub.add_parser("check", help="HIBP breach check (passwords or SHA-1 / NTLM hashes)",
+                        description="Check every line against Have I Been Pwned.")
+    sp.add_argument("path", help="input file ('-' for stdin, .gz accepted)")
+    sp.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    sp.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    sp.add_argument("--hashes", action="store_true", help="input lines are hex digests")
+    sp.add_argument("--hash-type", choices=("sha1", "ntlm"), default="sha1", help="digest type for --hashes")
+    sp.add_argument("--batch-size", type=int, default=5000, help="lines resolved together")
+    sp.add_argument("--threads", type=int, default=8, help="concurrent range lookups")
+    sp.add_argument("--timeout", type=float, default=8.0)
+    sp.add_argument("--include-password", action="store_true",
+                    help="copy the input into each record (off by default)")
+    breach_checker.add_cli_arguments(sp)
+    sp.set_defaults(func=run_check)
+
+    import hash_audit
+    sp = sub.add_parser("hashes", help="breach audit of a SHA-1 / NTLM hash dump",
+                        description="Check a hash dump against HIBP, one lookup per prefix; "
+                                    "writes matched accounts with their counts.")
+    hash_audit.build_parser(sp)
+    sp.set_defaults(func=hash_audit.run)
+
+    sp = sub.add_parser("generate", help="generate passwords or passphrases",
+                        description="Generate passwords (default) or passphrases, one per line.")
+    sp.add_argument("-n", "--count", type=int, default=1)
+    sp.add_argument("--length", type=int, default=16)
+    sp.add_argument("--no-symbols", action="store_true")
+    sp.add_argument("--passphrase", action="store_true")
+    sp.add_argument("--words", type=int, default=4)
+    sp.add_argument("--separator", default="-")
+    sp.add_argument("--capitalize", action="store_true")
+    sp.add_argument("--number", action="store_true", help="append a digit")
+    sp.add_argument("--symbol", action="store_true", help="append a symbol")
+    sp.add_argument("--min-word-len", type=int, default=None)
+    sp.add_argument("--max-word-len", type=int, default=None)
+    sp.add_argument("--exclude", action="append", default=[], help="word to leave out (repeatable)")
+    sp.add_argument("--no-repeat", action="store_true", help="no word twice in a phrase")
+    sp.add_argument("--min-entropy", type=float, default=None, help="fail if the policy gives fewer bits")
+    sp.add_argument("--json", action="store_true", help="JSONL with an entropy estimate")
+    sp.set_defaults(func=run_generate)
+
+    sp = sub.add_parser("audit", help="aggregate report over a file (process pool)",
+                        description="Audit a password or SHA-1 / NTLM hash file.")
+    audit.build_parser(sp)
+    sp.set_defaults(func=audit.run)
+
+    sp = sub.add_parser("serve", help="HTTP scoring / breach service",
+                        description="Run the micro-batching HTTP service.")
+    if serve:  # asyncio costs ~50 ms to import; other subcommands skip it
+        import service
+        service.build_parser(sp)
+        sp.set_defaults(func=service.run)
+    return p
+
+
+def _command(argv: List[str]) -> Optional[str]:
+    it = iter(argv)
+    for tok in it:
+        if tok == "--metrics":
+            next(it, None)
+        elif not tok.startswith("-"):
+            return tok
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser(serve=_command(argv) == "serve").parse_args(argv)
+    if args.metrics:
+        import metrics
+        metrics.enable()
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # downstream closed early (e.g. `| head`); exit quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    finally:
+        if args.metrics:
+            metrics.dump(args.metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
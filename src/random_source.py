@@ -0,0 +1,84 @@
+# random_source.py
+"""
+Buffered CSPRNG for bulk generation.
+
+os.urandom is read in large blocks and handed out piecewise, so generating a
+million passwords costs a few hundred syscalls instead of tens of millions of
+secrets.choice() calls. All mappings onto smaller ranges use rejection
+sampling, so the output stays exactly uniform. The buffer is discarded after
+fork() so parent and child never hand out the same bytes.
+"""
+from __future__ import annotations
+import os
+from array import array
+from functools import lru_cache
+from typing import List, Tuple
+
+DEFAULT_BLOCK = 1 << 16
+
+
+@lru_cache(maxsize=64)
+def _byte_table(alphabet: bytes) -> Tuple[bytes, bytes, int]:
+    """translate() table mapping a random byte onto `alphabet`, and the bytes to reject."""
+    size = len(alphabet)
+    if not 0 < size <= 256:
+        raise ValueError("alphabet must have 1..256 symbols")
+    limit = 256 - 256 % size  # largest multiple of size; bytes >= limit would bias
+    table = bytes(alphabet[b % size] if b < limit else 0 for b in range(256))
+    return table, bytes(range(limit, 256)), limit
+
+
+class RandomBuffer:
+    def __init__(self, block_size: int = DEFAULT_BLOCK):
+        self.block_size = max(64, int(block_size))
+        self._buf = b""
+        self._pos = 0
+        self._pid = os.getpid()
+
+    def read(self, n: int) -> bytes:
+        """n fresh random bytes."""
+        if self._pid != os.getpid():
+            self._buf, self._pos, self._pid = b"", 0, os.getpid()
+        if len(self._buf) - self._pos < n:
+            self._buf = self._buf[self._pos:] + os.urandom(max(self.block_size, n))
+            self._pos = 0
+        out = self._buf[self._pos:self._pos + n]
+        self._pos += n
+        return out
+
+    def choices(self, alphabet: bytes, count: int) -> bytes:
+        """`count` symbols drawn uniformly (with replacement) from a byte alphabet."""
+        table, reject, limit = _byte_table(bytes(alphabet))
+        out = b""
+        while len(out) < count:
+            need = count - len(out)
+            out += self.read(need * 256 // limit + 8).translate(table, reject)
+        return out[:count]
+
+    def below(self, n: int) -> int:
+        """One integer uniform in [0, n)."""
+        if n <= 1:
+            return 0
+        k = (n - 1).bit_length()
+        mask = (1 << k) - 1
+        nbytes = (k + 7) // 8
+        while True:
+            v = int.from_bytes(self.read(nbytes), "big") & mask
+            if v < n:
+                return v
+
+    def below_many(self, n: int, count: int) -> List[int]:
+        """`count` integers uniform in [0, n), drawn k bits at a time with rejection."""
+        if n <= 1:
+            return [0] * count
+        k = (n - 1).bit_length()
+        if k > 16:
+            return [self.below(n) for _ in range(count)]
+        mask = (1 << k) - 1
+        out: List[int] = []
+        while len(out) < count:
+            need = count - len(out)
+            words = array("H", self.read(2 * (need * (mask + 1) // n + 4)))
+            out.extend(v for v in (w & mask for w in words) if v < n)
+        del out[count:]
+        return out
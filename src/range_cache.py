@@ -0,0 +1,117 @@
+# range_cache.py
+"""
+Persistent /range/ cache backed by sqlite.
+
+Entries are opaque blobs (serialized RangeTables), stored zlib-compressed
+with a fetch timestamp for TTL expiry and a last-used timestamp for LRU eviction
+against a byte budget. Safe to share between threads; a forked worker opens
+its own connection on first use instead of reusing the parent's.
+"""
+from __future__ import annotations
+import os, sqlite3, threading, time, zlib
+from typing import Dict, Optional
+
+import metrics
+
+DEFAULT_TTL = 7 * 24 * 3600       # ranges change slowly; a week is plenty fresh
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ranges (
+    prefix    TEXT PRIMARY KEY,
+    data      BLOB NOT NULL,
+    fetched   REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ranges_lru ON ranges(last_used);
+"""
+
+
+class RangeCache:
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = float(ttl)
+        self.max_bytes = int(max_bytes)
+        self.hits = self.misses = self.expired = self.evictions = 0
+        self._lock = threading.Lock()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._open()
+
+    def _open(self):
+        self._pid = os.getpid()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        row = self._db.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM ranges").fetchone()
+        self._bytes = int(row[0])
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections must not cross fork(); the parent's stays untouched
+        if self._pid != os.getpid():
+            self._open()
+        return self._db
+
+    def close(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                self._db.close()
+
+    def get(self, prefix: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT data, fetched FROM ranges WHERE prefix = ?", (prefix,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            data, fetched = row
+            if now - fetched > self.ttl:
+                db.execute("DELETE FROM ranges WHERE prefix = ?", (prefix,))
+                self._bytes -= len(data)
+                self.expired += 1
+                self.misses += 1
+                return None
+            db.execute("UPDATE ranges SET last_used = ? WHERE prefix = ?", (now, prefix))
+            self.hits += 1
+        return zlib.decompress(data)
+
+    def put(self, prefix: str, payload: bytes) -> None:
+        data = zlib.compress(payload, 6)
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            old = db.execute(
+                "SELECT LENGTH(data) FROM ranges WHERE prefix = ?", (prefix,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO ranges(prefix, data, fetched, last_used) VALUES (?,?,?,?)",
+                (prefix, data, now, now))
+            self._bytes += len(data) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # drop least-recently-used rows until we are back under 90% of budget
+        target = int(self.max_bytes * 0.9)
+        while self._bytes > target:
+            rows = self._db.execute(
+                "SELECT prefix, LENGTH(data) FROM ranges ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                self._bytes = 0
+                break
+            for prefix, size in rows:
+                self._db.execute("DELETE FROM ranges WHERE prefix = ?", (prefix,))
+                self._bytes -= size
+                self.evictions += 1
+                if metrics.ENABLED:
+                    metrics.incr("breach_cache_evictions_total", tier="disk")
+                if self._bytes <= target:
+                    break
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn().execute("SELECT COUNT(*) FROM ranges").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "expired": self.expired,
+                "evictions": self.evictions, "entries": entries, "bytes": self._bytes}
@@ -0,0 +1,246 @@
+# range_server.py
+"""
+Local stand-in for the HIBP range API (GET /range/{prefix}, plus
+?mode=ntlm), for load tests, benchmarks and CI hosts that have no network or
+API quota.
+
+    python range_server.py --port 8787 --corpus leaked.txt --latency-ms 40 --jitter-ms 20
+    PSBC_API_BASE=http://127.0.0.1:8787/range/ python -m psbc check passwords.txt
+
+Every prefix answers with a deterministic synthetic range (`range_size`
+suffixes with nonzero counts) plus the corpus entries that fall in it;
+NTLM mode serves 27-char suffixes and NTLM corpus entries. When
+the request sends `Add-Padding: true`, as breach_checker does, the range is
+topped up with count-0 rows to 800-1000 lines, as the real API pads.
+
+Faults, all optional: a fixed latency plus uniform jitter per request; a
+server-side token bucket that answers 429 with Retry-After once `rate_limit`
+requests/s is exceeded; `fail_rate` of requests answered with `fail_status`;
+and `drop_rate` of connections closed without a response. Fault draws come
+from a seeded RNG, so a run is repeatable for a given request order.
+"""
+from __future__ import annotations
+import argparse, hashlib, math, random, sys, threading, time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+
+HEX = frozenset("0123456789ABCDEF")
+PAD_MIN, PAD_MAX = 800, 1000
+_BODY_CACHE = 4096  # rendered ranges kept (~30 KiB each)
+
+
+def load_corpus(path: str, hashes: bool = False, count: int = 1) -> Dict[str, Dict[str, int]]:
+    """
+    Read a corpus file into {prefix: {suffix: count}}. Lines are plaintext
+    passwords, or with `hashes` SHA-1 or NTLM digests optionally followed by
+    ':count' (the format of the HIBP downloads). NTLM suffixes are 27 chars,
+    so both kinds can share one table.
+    """
+    known: Dict[str, Dict[str, int]] = {}
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            if hashes:
+                digest, _, n = line.strip().partition(":")
+                digest = digest.upper()
+                if len(digest) not in (40, 32) or not HEX.issuperset(digest):
+                    continue
+                c = int(n) if n.strip().isdigit() else count
+            else:
+                digest, c = hashlib.sha1(line.encode("utf-8")).hexdigest().upper(), count
+            known.setdefault(digest[:5], {})[digest[5:]] = c
+    return known
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        srv: RangeServer = self.server
+        path, _, query = self.path.partition("?")
+        ntlm = "mode=ntlm" in query.lower().split("&")
+        head, _, prefix = path.rpartition("/")
+        prefix = prefix.upper()
+        if head != "/range" or len(prefix) != 5 or not HEX.issuperset(prefix):
+            srv.count(400)
+            self._reply(400, b"The hash prefix was not in a valid format")
+            return
+        fault = srv.fault()
+        if fault == "drop":
+            srv.count("dropped")
+            self.close_connection = True
+            return
+        if fault is not None:
+            status, retry_after = fault
+            srv.count(status)
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+            self._reply(status, b"Rate limit exceeded" if status == 429 else b"Service unavailable", headers)
+            return
+        padded = self.headers.get("Add-Padding", "").lower() == "true"
+        body = srv.range_body(prefix, padded, ntlm)
+        srv.count(200, len(body))
+        self._reply(200, body)
+
+    def _reply(self, status: int, body: bytes, headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RangeServer(ThreadingHTTPServer):
+    """
+    Threaded /range/ server; `port=0` picks a free port (see `base`).
+    start()/stop() run it on a daemon thread inside the caller's process.
+    """
+    daemon_threads = True
+    request_queue_size = 1024  # load tests open many connections at once
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, known=None, range_size: int = 800,
+                 latency: float = 0.0, jitter: float = 0.0, rate_limit: Optional[float] = None,
+                 fail_rate: float = 0.0, fail_status: int = 503, drop_rate: float = 0.0,
+                 seed: int = 0):
+        super().__init__((host, port), _Handler)
+        self.known: Dict[str, Dict[str, int]] = known if known is not None else {}
+        self.range_size = range_size
+        self.latency, self.jitter = latency, jitter
+        self.rate_limit = rate_limit
+        self.fail_rate, self.fail_status, self.drop_rate = fail_rate, fail_status, drop_rate
+        self.stats: Dict[str, int] = {"requests": 0, "bytes": 0}
+        self._rng = random.Random(seed)
+        self._tokens = float(max(1.0, rate_limit or 1.0))
+        self._stamp = time.monotonic()
+        self._bodies: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/range/"
+
+    def seed(self, passwords: Iterable[str], count: int = 42) -> None:
+        """Add plaintext passwords to the corpus with the given breach count."""
+        self.seed_hashes((hashlib.sha1(p.encode("utf-8")).hexdigest() for p in passwords), count)
+
+    def seed_hashes(self, hashes: Iterable[str], count: int = 42) -> None:
+        """Add SHA-1 (40 hex) or NTLM (32 hex) digests to the corpus."""
+        with self._lock:
+            for full in hashes:
+                full = full.upper()
+                self.known.setdefault(full[:5], {})[full[5:]] = count
+            self._bodies.clear()
+
+    def fault(self):
+        """None to serve normally, "drop", or (status, retry_after) after the injected latency."""
+        with self._lock:
+            u_fail, u_drop, u_lat = self._rng.random(), self._rng.random(), self._rng.random()
+        delay = self.latency + self.jitter * u_lat
+        if delay > 0:
+            time.sleep(delay)
+        if u_drop < self.drop_rate:
+            return "drop"
+        if u_fail < self.fail_rate:
+            return self.fail_status, 1 if self.fail_status == 503 else None
+        if self.rate_limit:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(max(1.0, self.rate_limit), self._tokens + (now - self._stamp) * self.rate_limit)
+                self._stamp = now
+                if self._tokens < 1.0:
+                    return 429, max(1, math.ceil((1.0 - self._tokens) / self.rate_limit))
+                self._tokens -= 1.0
+        return None
+
+    def count(self, status, nbytes: int = 0) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += nbytes
+            self.stats[str(status)] = self.stats.get(str(status), 0) + 1
+
+    def range_body(self, prefix: str, padded: bool = True, ntlm: bool = False) -> bytes:
+        key = (prefix, padded, ntlm)
+        w = 27 if ntlm else 35
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+                return body
+            rows = [f"{s}:{c}" for s, c in self.known.get(prefix, {}).items() if len(s) == w]
+        # filler: `w` hex digits of suffix + 3 for the count per 20 random bytes;
+        # the same for a prefix on every run
+        rng = random.Random(f"{prefix}/{w}")
+        n = max(0, self.range_size - len(rows))
+        raw = rng.randbytes(20 * n).hex().upper()
+        rows += [raw[o:o + w] + ":%d" % (int(raw[o + w:o + w + 3], 16) % 500 + 1) for o in range(0, 40 * n, 40)]
+        if padded:
+            n = max(0, rng.randint(PAD_MIN, PAD_MAX) - len(rows))
+            raw = rng.randbytes(18 * n).hex().upper()
+            rows += [raw[o:o + w] + ":0" for o in range(0, 36 * n, 36)]
+        rows.sort()  # suffixes are fixed width, so this orders by suffix
+        body = "\r\n".join(rows).encode("ascii")
+        with self._lock:
+            self._bodies[key] = body
+            while len(self._bodies) > _BODY_CACHE:
+                self._bodies.popitem(last=False)
+        return body
+
+    def start(self) -> "RangeServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def build_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    p = parser or argparse.ArgumentParser(description="Local stand-in for the HIBP range API.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8787)
+    p.add_argument("--corpus", default=None, help="passwords (or --hashes: HASH[:count]) served as breached")
+    p.add_argument("--hashes", action="store_true", help="corpus lines are SHA-1 or NTLM digests")
+    p.add_argument("--count", type=int, default=42, help="breach count for corpus lines without one")
+    p.add_argument("--range-size", type=int, default=800, help="synthetic nonzero rows per prefix")
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform 0..jitter latency")
+    p.add_argument("--rate-limit", type=float, default=None, help="requests/s before answering 429")
+    p.add_argument("--fail-rate", type=float, default=0.0, help="fraction answered with --fail-status")
+    p.add_argument("--fail-status", type=int, default=503)
+    p.add_argument("--drop-rate", type=float, default=0.0, help="fraction of connections closed unanswered")
+    p.add_argument("--seed", type=int, default=0, help="fault RNG seed")
+    return p
+
+
+def server_from_args(args, host: Optional[str] = None, port: Optional[int] = None) -> RangeServer:
+    known = load_corpus(args.corpus, args.hashes, args.count) if args.corpus else None
+    return RangeServer(args.host if host is None else host, args.port if port is None else port,
+                       known, args.range_size, args.latency_ms / 1e3, args.jitter_ms / 1e3,
+                       args.rate_limit, args.fail_rate, args.fail_status, args.drop_rate, args.seed)
+
+
+def run(args) -> int:
+    server = server_from_args(args)
+    entries = sum(len(v) for v in server.known.values())
+    print(f"range stand-in on {server.base} ({entries} corpus hashes)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"served: {server.stats}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(build_parser().parse_args()))
@@ -0,0 +1,94 @@
+# range_table.py
+"""
+Parsed form of one /range/ response: fixed-width upper-case suffixes packed
+into a single sorted bytes object plus an array('I') of counts. Built once
+per fetch (padding rows dropped), then every lookup is a binary search.
+"""
+from __future__ import annotations
+import struct, sys
+from array import array
+from typing import Iterator, Tuple
+
+_MAGIC = b"RT1"
+_HEADER = struct.Struct("<3sHI")
+
+
+class RangeTable:
+    __slots__ = ("width", "suffixes", "counts")
+
+    def __init__(self, width: int, suffixes: bytes, counts: array):
+        self.width = width
+        self.suffixes = suffixes
+        self.counts = counts
+
+    @classmethod
+    def from_text(cls, text: str) -> "RangeTable":
+        rows = []
+        width = 0
+        for line in text.splitlines():
+            sfx, sep, cnt = line.partition(":")
+            if not sep:
+                continue
+            try:
+                n = int(cnt)
+            except ValueError:
+                n = 1
+            if n <= 0:
+                continue  # padding entry
+            sfx = sfx.strip().upper().encode("ascii", "ignore")
+            if not width:
+                width = len(sfx)
+            if len(sfx) == width:
+                rows.append((sfx, min(n, 0xFFFFFFFF)))
+        rows.sort()
+        return cls(width, b"".join(r[0] for r in rows), array("I", (r[1] for r in rows)))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RangeTable":
+        magic, width, n = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or len(data) != _HEADER.size + n * (width + 4):
+            raise ValueError("not a serialized RangeTable")
+        start = _HEADER.size + n * width
+        counts = array("I")
+        counts.frombytes(data[start:])
+        if sys.byteorder != "little":
+            counts.byteswap()
+        return cls(width, data[_HEADER.size:start], counts)
+
+    def to_bytes(self) -> bytes:
+        counts = array("I", self.counts)
+        if sys.byteorder != "little":
+            counts.byteswap()
+        return _HEADER.pack(_MAGIC, self.width, len(self.counts)) + self.suffixes + counts.tobytes()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident size: the packed suffixes and counts plus object overhead."""
+        return len(self.suffixes) + self.counts.itemsize * len(self.counts) + 200
+
+    def count(self, suffix: str) -> int:
+        """Breach count for an upper-case hex suffix, 0 if absent."""
+        w = self.width
+        if len(suffix) != w:
+            return 0
+        key = suffix.encode("ascii")
+        data = self.suffixes
+        lo, hi = 0, len(self.counts)
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            cur = data[mid * w:(mid + 1) * w]
+            if cur < key:
+                lo = mid + 1
+            elif cur > key:
+                hi = mid
+            else:
+                return self.counts[mid]
+        return 0
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        w, data = self.width, self.suffixes
+        for i, n in enumerate(self.counts):
+            yield data[i * w:(i + 1) * w].decode("ascii"), n
@@ -0,0 +1,136 @@
+# resilience.py
+"""
+Client-side flow control for the range API: an adaptive token bucket, a
+jittered exponential retry policy that honours Retry-After, and a circuit
+breaker. All pieces are thread-safe and expose plain counters; callers do the
+actual sleeping so the same objects serve both the sync and asyncio paths.
+"""
+from __future__ import annotations
+import random, threading, time
+from typing import Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is known to be down."""
+
+
+class TokenBucket:
+    """
+    Token bucket with AIMD adaptation: throttle() halves the rate (e.g. on a
+    429), every success creeps it back toward the configured ceiling.
+    rate=None disables limiting.
+    """
+
+    def __init__(self, rate: Optional[float] = 50.0, burst: int = 50, min_rate: float = 1.0):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self.min_rate = min_rate
+        self.waited = 0.0
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; return how long the caller must wait before using it."""
+        if self.rate is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1.0
+            delay = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            self.waited += delay
+            return delay
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def throttle(self) -> None:
+        if self.rate is None:
+            return
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+
+    def recover(self) -> None:
+        if self.rate is None or self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + max(0.5, self.max_rate * 0.02))
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 3, base: float = 0.5, cap: float = 30.0,
+                 max_retry_after: float = 60.0):
+        self.max_retries = max(0, int(max_retries))
+        self.base = base
+        self.cap = cap
+        self.max_retry_after = max_retry_after
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        Seconds to wait before retry number `attempt` (0-based), or None when
+        the caller should give up.
+        """
+        if attempt >= self.max_retries:
+            return None
+        # "full jitter" exponential backoff
+        backoff = random.uniform(0, min(self.cap, self.base * (2 ** attempt)))
+        if retry_after:
+            try:
+                hint = float(retry_after)
+            except ValueError:
+                hint = None
+            if hint is not None:
+                if hint > self.max_retry_after:
+                    return None
+                return max(hint, backoff)
+        return backoff
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._probe_out = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_out = False
+            # half-open: let exactly one probe through
+            if self._probe_out:
+                return False
+            self._probe_out = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+            self._probe_out = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_out = False
@@ -0,0 +1,109 @@
+# score_cache.py
+"""
+Bounded LRU memo in front of compute_score.
+
+Results are keyed on a keyed BLAKE2b digest of the password (random per-cache
+salt), so the result cache never stores plaintext. With incremental=True the
+cache also keeps the class mask and the pattern-scanner state of recently
+scored passwords; when a new password extends one of them (typing, pasting
+onto the end) only the new tail is scanned. Scanner states necessarily hold
+the text they have seen, so that part is off by default, small, and dropped
+by clear().
+"""
+from __future__ import annotations
+import hashlib, os, threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import patterns
+from patterns import PatternScanner
+from scorer_logic import class_mask, score_from_parts
+
+MAX_TAIL = 16  # how far back to look for a cached prefix
+
+
+class ScoreCache:
+    def __init__(self, maxsize: int = 4096, incremental: bool = False,
+                 prefix_maxsize: int = 64, salt: Optional[bytes] = None):
+        self.maxsize = max(1, int(maxsize))
+        self.incremental = incremental
+        self.prefix_maxsize = max(1, int(prefix_maxsize))
+        self._salt = salt or os.urandom(16)
+        self._results: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._prefixes: "OrderedDict[bytes, Tuple[int, PatternScanner]]" = OrderedDict()
+        self._matcher = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.prefix_hits = 0
+
+    def _key(self, pwd: str) -> bytes:
+        return hashlib.blake2b(pwd.encode("utf-8", "surrogatepass"),
+                               key=self._salt, digest_size=16).digest()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self._prefixes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "prefix_hits": self.prefix_hits,
+                    "size": len(self._results), "prefix_states": len(self._prefixes)}
+
+    def compute(self, pwd: str):
+        """Same return value as scorer_logic.compute_score."""
+        # a new dictionary invalidates everything we have scored so far
+        current = patterns._matcher()
+        if current is not self._matcher:
+            self.clear()
+            self._matcher = current
+
+        key = self._key(pwd)
+        with self._lock:
+            hit = self._results.get(key)
+            if hit is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit is not None:
+            return _copy(hit)
+
+        if self.incremental:
+            mask, scanner = self._scan_incremental(pwd, key)
+        else:
+            mask, scanner = class_mask(pwd), PatternScanner().feed(pwd)
+        result = score_from_parts(pwd, mask, scanner.matches())
+
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return _copy(result)
+
+    def _scan_incremental(self, pwd: str, key: bytes):
+        base = None
+        cut = 0
+        with self._lock:
+            for cut in range(len(pwd) - 1, max(len(pwd) - MAX_TAIL, 0) - 1, -1):
+                if cut <= 0:
+                    break
+                base = self._prefixes.get(self._key(pwd[:cut]))
+                if base is not None:
+                    self.prefix_hits += 1
+                    break
+        if base is not None:
+            tail = pwd[cut:]
+            mask, scanner = base[0] | class_mask(tail), base[1].copy().feed(tail)
+        else:
+            mask, scanner = class_mask(pwd), PatternScanner().feed(pwd)
+        with self._lock:
+            self._prefixes[key] = (mask, scanner)
+            while len(self._prefixes) > self.prefix_maxsize:
+                self._prefixes.popitem(last=False)
+        return mask, scanner
+
+
+def _copy(result):
+    # reasons is the only mutable member
+    score, label, reasons, bits, t1, t2 = result
+    return score, label, list(reasons), bits, t1, t2
@@ -1,18 +1,113 @@
-import string
-from entropy import estimate_entropy_bits, estimate_crack_time_seconds
-from patterns import (
-    has_repeated_runs, has_simple_sequence, has_keyboard_walk,
-    contains_year, contains_common_word_or_leet
+import string, time
+from array import array
+from typing import Iterable, NamedTuple
+from entropy import estimate_crack_time_seconds
+from guess_estimator import estimate_guess_bits
+from patterns import scan_patterns
+import metrics
+
+# numpy is optional and costs ~100 ms to import, so it is loaded by the first
+# compute_scores call; without it compute_scores falls back to array/loops
+np = None
+_NP_TRIED = False
+
+def _numpy():
+    global np, _NP_TRIED
+    if not _NP_TRIED:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+        _NP_TRIED = True
+    return np
+
+# reason bitmask used by compute_scores; order == order of compute_score's reasons
+R_REPEAT, R_SEQUENCE, R_KEYBOARD, R_YEAR, R_COMMON_WORD = 1, 2, 4, 8, 16
+R_SHORT = 32
+R_NO_LOWER, R_NO_UPPER, R_NO_DIGIT, R_NO_SYMBOL = 64, 128, 256, 512
+R_LONGER = 1024
+
+LABELS = ("Weak", "Medium", "Strong")  # label codes 0, 1, 2
+
+# (pattern kinds, reason bit, deduction, message)
+_PATTERN_RULES = (
+    (("repeat",), R_REPEAT, 8, "Avoid repeating characters like 'aaa' or '111'."),
+    (("sequence",), R_SEQUENCE, 8, "Avoid simple sequences like 'abcd' or '1234'."),
+    (("keyboard",), R_KEYBOARD, 6, "Avoid keyboard patterns like 'qwerty' or 'asdf'."),
+    (("year",), R_YEAR, 5, "Avoid using a year (e.g., 2024)."),
+    (("dictionary", "leet"), R_COMMON_WORD, 10, "Avoid common words (even with leetspeak)."),
 )
+_MAX_DEDUCTION = 35
+_KIND_BITS = {k: bit for kinds, bit, _, _ in _PATTERN_RULES for k in kinds}
+_MISSING = ((R_NO_LOWER, "lowercase"), (R_NO_UPPER, "uppercase"),
+            (R_NO_DIGIT, "digits"), (R_NO_SYMBOL, "symbols"))
+
+_C_LOWER, _C_UPPER, _C_DIGIT, _C_SYMBOL = 1, 2, 4, 8
+_PUNCT = frozenset(string.punctuation)
+
+def _char_class(c: str) -> int:
+    return ((_C_LOWER if c.islower() else 0) | (_C_UPPER if c.isupper() else 0)
+            | (_C_DIGIT if c.isdigit() else 0) | (_C_SYMBOL if c in _PUNCT else 0))
+
+_ASCII_CLASS = bytes(_char_class(chr(i)) for i in range(128))
+_ASCII_SETS = tuple((frozenset(c for c in map(chr, range(128)) if _ASCII_CLASS[ord(c)] & bit), bit)
+                    for bit in (_C_LOWER, _C_UPPER, _C_DIGIT, _C_SYMBOL))
+
+def class_mask(pwd: str) -> int:
+    """Bitmask of the character classes present (lower 1, upper 2, digit 4, symbol 8)."""
+    if pwd.isascii():
+        chars = set(pwd)
+        return sum(bit for members, bit in _ASCII_SETS if not members.isdisjoint(chars))
+    mask = 0
+    for c in set(pwd):
+        mask |= _char_class(c)
+    return mask
 
 def compute_score(pwd: str):
+    if metrics.ENABLED:
+        return _compute_score_timed(pwd)
+    return score_from_parts(pwd, class_mask(pwd), scan_patterns(pwd))
+
+_STAGE_KEYS = tuple(metrics.key("score_stage_seconds", stage=s)
+                    for s in ("class_scan", "patterns", "entropy", "rules"))
+_SCORE_KEY = metrics.key("score_seconds")
+_LABEL_KEYS = {label: metrics.key("scored_total", label=label) for label in LABELS}
+_KIND_KEYS = {}
+
+def _compute_score_timed(pwd: str):
+    # the detectors share one pass over the text, so they are timed together
+    # as "patterns"; per-kind match counts show which of them fired
+    clock = time.perf_counter
+    t0 = clock()
+    mask = class_mask(pwd)
+    t1 = clock()
+    matches = scan_patterns(pwd)
+    t2 = clock()
+    bits = estimate_guess_bits(pwd, matches)
+    t3 = clock()
+    result = score_from_parts(pwd, mask, matches, bits)
+    t4 = clock()
+    counts = [(_LABEL_KEYS[result[1]], 1)]
+    for kind in {m.kind for m in matches}:
+        k = _KIND_KEYS.get(kind)
+        if k is None:
+            k = _KIND_KEYS[kind] = metrics.key("pattern_hits_total", kind=kind)
+        counts.append((k, 1))
+    s0, s1, s2, s3 = _STAGE_KEYS
+    metrics.record(((s0, t1 - t0), (s1, t2 - t1), (s2, t3 - t2), (s3, t4 - t3),
+                    (_SCORE_KEY, t4 - t0)), counts)
+    return result
+
+def score_from_parts(pwd: str, mask: int, matches, bits: float = None):
+    """compute_score given the password's class mask and pattern matches (and guess bits)."""
     length = len(pwd)
     reasons = []
 
-    has_lower = any(c.islower() for c in pwd)
-    has_upper = any(c.isupper() for c in pwd)
-    has_digit = any(c.isdigit() for c in pwd)
-    has_symbol = any(c in string.punctuation for c in pwd)
+    has_lower = bool(mask & _C_LOWER)
+    has_upper = bool(mask & _C_UPPER)
+    has_digit = bool(mask & _C_DIGIT)
+    has_symbol = bool(mask & _C_SYMBOL)
     classes = sum([has_lower, has_upper, has_digit, has_symbol])
 
     length_score  = min(50, int(length * 50 / 16))
@@ -27,18 +122,11 @@ def compute_score(pwd: str):
     raw = length_score + variety_score + bonus
 
     deduction = 0
-    max_deduction = 35
-    if has_repeated_runs(pwd, 3):
-        deduction += 8; reasons.append("Avoid repeating characters like 'aaa' or '111'.")
-    if has_simple_sequence(pwd, 4):
-        deduction += 8; reasons.append("Avoid simple sequences like 'abcd' or '1234'.")
-    if has_keyboard_walk(pwd, 4):
-        deduction += 6; reasons.append("Avoid keyboard patterns like 'qwerty' or 'asdf'.")
-    if contains_year(pwd):
-        deduction += 5; reasons.append("Avoid using a year (e.g., 2024).")
-    if contains_common_word_or_leet(pwd):
-        deduction += 10; reasons.append("Avoid common words (even with leetspeak).")
-    deduction = min(deduction, max_deduction)
+    found = {m.kind for m in matches}
+    for kinds, _, weight, message in _PATTERN_RULES:
+        if any(k in found for k in kinds):
+            deduction += weight; reasons.append(message)
+    deduction = min(deduction, _MAX_DEDUCTION)
 
     score = max(0, min(100, raw - deduction))
 
@@ -56,7 +144,160 @@ def compute_score(pwd: str):
 
     label = "Weak" if score < 50 else ("Medium" if score < 80 else "Strong")
 
-    bits = estimate_entropy_bits(pwd)
+    if bits is None:
+        bits = estimate_guess_bits(pwd, matches)  # log2(guesses), pattern-aware
     t1 = estimate_crack_time_seconds(bits, 1e9)    # 1e9 guesses/s
     t2 = estimate_crack_time_seconds(bits, 1e12)   # 1e12 guesses/s
     return score, label, reasons, bits, t1, t2
+
+def reasons_from_mask(mask: int):
+    """Expand a compute_scores reason bitmask into compute_score's messages."""
+    reasons = [message for _, bit, _, message in _PATTERN_RULES if mask & bit]
+    if mask & R_SHORT:
+        reasons.append("Use at least 12 characters.")
+    missing = [name for bit, name in _MISSING if mask & bit]
+    if missing:
+        reasons.append("Add " + ", ".join(missing) + ".")
+    if mask & R_LONGER:
+        reasons.append("Make it a bit longer (14–16) or add more variety.")
+    return reasons
+
+# ---- batch scoring ----
+
+def _class_masks_numpy(pwds):
+    """Lengths and class masks for the whole batch from one packed buffer."""
+    lengths = np.fromiter((len(p) for p in pwds), dtype=np.int64, count=len(pwds))
+    offsets = np.zeros(len(pwds), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    # surrogatepass: lone surrogates (e.g. JSON "\udcff") are valid str input
+    codes = np.frombuffer("".join(pwds).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    table = np.frombuffer(_ASCII_CLASS, dtype=np.uint8)
+    per_char = table[np.minimum(codes, 127)]
+    wide = codes > 127
+    if wide.any():
+        uniq, inverse = np.unique(codes[wide], return_inverse=True)
+        per_char[wide] = np.array([_char_class(chr(c)) for c in uniq], dtype=np.uint8)[inverse]
+    masks = np.zeros(len(pwds), dtype=np.uint8)
+    nonempty = lengths > 0
+    if nonempty.any():
+        masks[nonempty] = np.bitwise_or.reduceat(per_char, offsets[nonempty])
+    return lengths, masks
+
+class ScoreColumns(NamedTuple):
+    score: "array"     # 0..100
+    label: "array"     # index into LABELS
+    bits: "array"      # log2(guesses)
+    t1: "array"        # seconds @ 1e9 guesses/s
+    t2: "array"        # seconds @ 1e12 guesses/s
+    reasons: "array"   # R_* bitmask, see reasons_from_mask()
+
+def compute_scores(batch: Iterable[str]) -> ScoreColumns:
+    """
+    Score many passwords at once and return columnar results. Length, class,
+    score and crack-time arithmetic runs over whole columns (NumPy when
+    installed, typed arrays otherwise); only pattern scanning and the guess
+    estimator run per password. Same numbers as compute_score, without the
+    per-result tuples and reason strings.
+    """
+    pwds = batch if isinstance(batch, list) else list(batch)
+    if metrics.ENABLED:
+        with metrics.timer("score_batch_seconds"):
+            cols = _compute_scores(pwds)
+        metrics.incr("scored_batch_items_total", len(pwds))
+        return cols
+    return _compute_scores(pwds)
+
+def _compute_scores(pwds) -> ScoreColumns:
+    n = len(pwds)
+
+    # the per-item part (patterns + guess estimate) runs once per distinct password
+    kind_bits = _KIND_BITS
+    first = {}
+    for pwd in pwds:
+        if pwd not in first:
+            first[pwd] = len(first)
+    u_mask = array("H", bytes(2 * len(first)))
+    u_bits = array("d", bytes(8 * len(first)))
+    for pwd, j in first.items():
+        if not pwd:
+            continue
+        matches = scan_patterns(pwd)
+        m = 0
+        for match in matches:
+            m |= kind_bits.get(match.kind, 0)
+        u_mask[j] = m
+        u_bits[j] = estimate_guess_bits(pwd, matches)
+    if len(first) == n:
+        pattern_mask, bits = u_mask, u_bits
+    else:
+        pattern_mask = array("H", (u_mask[first[p]] for p in pwds))
+        bits = array("d", (u_bits[first[p]] for p in pwds))
+
+    if _numpy() is not None and n:
+        lengths, masks = _class_masks_numpy(pwds)
+        pm = np.frombuffer(pattern_mask, dtype=np.uint16).astype(np.int64)
+        b = np.frombuffer(bits, dtype=np.float64)
+        classes = ((masks & 1) + ((masks >> 1) & 1) + ((masks >> 2) & 1) + ((masks >> 3) & 1)).astype(np.int64)
+        raw = (np.minimum(50, lengths * 50 // 16) + classes * 10
+               + np.where((lengths >= 12) & (classes >= 3), 5, 0)
+               + np.where((lengths >= 16) & (classes == 4), 10, 0))
+        deduction = np.zeros(n, dtype=np.int64)
+        for _, bit, weight, _ in _PATTERN_RULES:
+            deduction += np.where(pm & bit, weight, 0)
+        score = np.clip(raw - np.minimum(deduction, _MAX_DEDUCTION), 0, 100)
+        label = (score >= 50).astype(np.uint8) + (score >= 80).astype(np.uint8)
+        inv = (~masks.astype(np.int64)) & 15
+        reasons = (pm | np.where(lengths < 12, R_SHORT, 0)
+                   | np.where(classes < 4, inv * R_NO_LOWER, 0)
+                   | np.where((lengths >= 12) & (classes >= 3) & (score < 90), R_LONGER, 0))
+        crack = np.where(b > 0, 0.5 * np.exp2(b), 0.0)
+        return ScoreColumns(score.astype(np.uint8), label, b,
+                            crack / 1e9, crack / 1e12, reasons.astype(np.uint16))
+
+    score = array("B", bytes(n))
+    label = array("B", bytes(n))
+    reasons = array("H", bytes(2 * n))
+    t1 = array("d", bytes(8 * n))
+    t2 = array("d", bytes(8 * n))
+    for i, pwd in enumerate(pwds):
+        length = len(pwd)
+        mask = class_mask(pwd)
+        classes = (mask & 1) + (mask >> 1 & 1) + (mask >> 2 & 1) + (mask >> 3 & 1)
+        raw = min(50, length * 50 // 16) + classes * 10
+        if length >= 12 and classes >= 3:
+            raw += 5
+        if length >= 16 and classes == 4:
+            raw += 10
+        pm = pattern_mask[i]
+        deduction = 0
+        for _, bit, weight, _ in _PATTERN_RULES:
+            if pm & bit:
+                deduction += weight
+        s = max(0, min(100, raw - min(deduction, _MAX_DEDUCTION)))
+        r = pm
+        if length < 12:
+            r |= R_SHORT
+        if classes < 4:
+            r |= (~mask & 15) * R_NO_LOWER
+        if length >= 12 and classes >= 3 and s < 90:
+            r |= R_LONGER
+        score[i], reasons[i] = s, r
+        label[i] = 0 if s < 50 else (1 if s < 80 else 2)
+        t1[i] = estimate_crack_time_seconds(bits[i], 1e9)
+        t2[i] = estimate_crack_time_seconds(bits[i], 1e12)
+    return ScoreColumns(score, label, bits, t1, t2, reasons)
+
+if __name__ == "__main__":
+    # compute_scores must agree with compute_score on both the NumPy and
+    # the array paths, including odd str input such as lone surrogates
+    sample = ["", "a", "password", "P@ssw0rd2024!", "qwertyuiop", "ÄÖÜäöüß123",
+              "x\udcffy", "\ud800", "correct horse battery staple", "Zz9!" * 10]
+    for use_numpy in (True, False):
+        np, _NP_TRIED = (None, True) if not use_numpy else (np, False)
+        cols = compute_scores(sample)
+        for i, pwd in enumerate(sample):
+            s, label, reasons, bits, t1, t2 = compute_score(pwd)
+            got = (int(cols.score[i]), LABELS[cols.label[i]], reasons_from_mask(int(cols.reasons[i])))
+            assert got == (s, label, reasons), (pwd, got, (s, label, reasons))
+            assert abs(cols.bits[i] - bits) < 1e-9, pwd
+        print(f"compute_scores == compute_score ({'numpy' if _numpy() else 'array'} path)")
@@ -0,0 +1,493 @@
+# service.py
+"""
+Internal HTTP service for signup / password-change flows (asyncio, stdlib).
+
+    POST /score      {"password": "..."} or {"passwords": [...]}
+    POST /check      {"password": "..."} or {"passwords": [...]}   (HIBP)
+    POST /generate   {"count": 5, "length": 16} or {"passphrase": true, "words": 5}
+    GET  /metrics    queue depth, batch sizes, latency percentiles, breach stats
+    GET  /metrics/prometheus   counters and histograms from metrics.py (text format; needs --metrics)
+    GET  /healthz
+
+Requests that arrive within `max_delay` of each other are coalesced by a
+MicroBatcher into one call: scoring batches go through compute_scores on a
+process pool, breach batches are grouped by SHA-1 prefix and resolved through
+one shared RangeClient, which also joins identical prefixes that are already
+in flight. When more than `max_queue` items are waiting, new requests get 503
+with Retry-After instead of queueing without bound, so latency stays flat
+under overload.
+
+With --metrics (or PSBC_METRICS=1), request, breach and cache metrics are
+collected in the service process; batch scoring times only with -j 0, since
+pool workers don't record. Off, the hot paths skip all of it (about 8% of
+request time on cache-warm /score traffic when on).
+"""
+from __future__ import annotations
+import argparse, asyncio, json, sys, time
+from collections import deque
+from concurrent.futures import BrokenExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import breach_async
+import breach_checker as bc
+import metrics
+from scorer_logic import LABELS, compute_scores, reasons_from_mask
+
+MAX_BODY = 1 << 20
+MAX_ITEMS = 1000          # passwords per request
+MAX_LENGTH = 256          # /generate password length
+MAX_WORDS = 64            # /generate passphrase words
+LATENCY_WINDOW = 4096     # recent requests kept for percentiles
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BatchItemError(Exception):
+    """An item failed on its own; the detail stays in the server, not in the reply."""
+
+
+# what an input can make a batch runner raise; anything else (a dead worker
+# pool, a bug in the runner) is the service's fault and fails the whole batch
+_ITEM_ERRORS = (ValueError, TypeError)
+
+
+class MicroBatcher:
+    """
+    Collects items submitted within `max_delay` seconds (or until `max_batch`
+    are waiting) and hands them to `run(batch) -> results` as one call. At most
+    `concurrency` batches run at once; the rest wait their turn.
+    """
+
+    def __init__(self, run: Callable[[List], Awaitable[Sequence]], max_batch: int = 256,
+                 max_delay: float = 0.002, concurrency: int = 1, max_queue: int = 10000):
+        self._run = run
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max(0.0, float(max_delay))
+        self.max_queue = max_queue
+        self._sem = asyncio.Semaphore(max(1, int(concurrency)))
+        self._items: List = []
+        self._futures: List[asyncio.Future] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.depth = 0            # items submitted and not yet answered
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+
+    async def submit_many(self, items: Sequence) -> List:
+        if self.depth + len(items) > self.max_queue:
+            raise Overloaded()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            fut = loop.create_future()
+            self._items.append(item)
+            self._futures.append(fut)
+            futures.append(fut)
+            if len(self._items) >= self.max_batch:
+                self._flush()
+        self.depth += len(items)
+        if self._items and self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        try:
+            return list(await asyncio.gather(*futures))
+        finally:
+            self.depth -= len(items)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._items:
+            return
+        items, futures = self._items, self._futures
+        self._items, self._futures = [], []
+        self.batches += 1
+        self.items += len(items)
+        self.max_seen = max(self.max_seen, len(items))
+        asyncio.ensure_future(self._execute(items, futures))
+
+    async def _execute(self, items: List, futures: List[asyncio.Future]) -> None:
+        async with self._sem:
+            try:
+                results = await self._run(items)
+            except _ITEM_ERRORS:
+                if len(items) == 1:
+                    _fail(futures, BatchItemError())
+                else:
+                    # one bad item must not fail the requests it was batched
+                    # with: rerun each alone so only its own future errors
+                    await self._execute_each(items, futures)
+                return
+            except Exception as e:
+                _fail(futures, e)
+                return
+        for fut, res in zip(futures, results):
+            if not fut.done():
+                fut.set_result(res)
+
+    async def _execute_each(self, items: List, futures: List[asyncio.Future]) -> None:
+        for i, (item, fut) in enumerate(zip(items, futures)):
+            try:
+                res = (await self._run([item]))[0]
+            except _ITEM_ERRORS:
+                _fail([fut], BatchItemError())
+                continue
+            except Exception as e:
+                _fail(futures[i:], e)
+                return
+            if not fut.done():
+                fut.set_result(res)
+
+    def stats(self) -> dict:
+        return {"queue_depth": self.depth, "batches": self.batches, "items": self.items,
+                "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "max_batch": self.max_seen}
+
+
+def _fail(futures: List[asyncio.Future], exc: BaseException) -> None:
+    for fut in futures:
+        if not fut.done():
+            fut.set_exception(exc)
+
+
+def _score_batch(pwds: List[str]) -> List[dict]:
+    """compute_scores over one batch, as JSON-ready dicts (runs in a worker)."""
+    cols = compute_scores(pwds)
+    return [{
+        "score": int(cols.score[i]),
+        "label": LABELS[cols.label[i]],
+        "bits": round(float(cols.bits[i]), 2),
+        "t1": float(cols.t1[i]),
+        "t2": float(cols.t2[i]),
+        "reasons": reasons_from_mask(int(cols.reasons[i])),
+    } for i in range(len(pwds))]
+
+
+def _generate(spec: dict) -> dict:
+    """/generate body (already validated) -> response (runs in a worker)."""
+    count = spec["count"]
+    if spec["passphrase"]:
+        import passphrase_generator as pgen
+        words, number, symbol, policy = spec["words"], spec["number"], spec["symbol"], spec["policy"]
+        items = list(pgen.generate_passphrases(
+            count, words, spec["separator"], spec["capitalize"], number, symbol,
+            min_entropy=spec["min_entropy"], **policy))
+        bits = pgen.estimate_entropy_bits(words, number, symbol, **policy)
+    else:
+        from password_generator import generate_passwords, password_entropy_bits
+        length, symbols = spec["length"], spec["symbols"]
+        items = list(generate_passwords(count, length, symbols))
+        bits = password_entropy_bits(length, symbols)
+    return {"results": items, "entropy_bits": bits}
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class Service:
+    def __init__(self, workers: int = 2, max_batch: int = 256, max_delay: float = 0.002,
+                 max_queue: int = 10000, max_connections: int = 16):
+        self.workers = workers
+        self.max_connections = max_connections
+        self._pool = None
+        self._client: Optional[breach_async.RangeClient] = None
+        self.scorer = MicroBatcher(self._score, max_batch, max_delay, max(1, workers), max_queue)
+        self.checker = MicroBatcher(self._check, max_batch, max_delay, 4, max_queue)
+        self.latency: Dict[str, deque] = {}
+        self.requests = 0
+        self.rejected = 0
+        self.started = time.time()
+
+    # ---- batch runners ----
+
+    def _executor(self):
+        """Process pool shared by scoring and generation (None = default threads with -j 0)."""
+        if self._pool is None and self.workers > 0:
+            import multiprocessing as mp
+            from concurrent.futures import ProcessPoolExecutor
+            from scorer_logic import _numpy
+            _numpy()  # import once before the workers fork
+            methods = mp.get_all_start_methods()
+            ctx = mp.get_context("fork" if "fork" in methods else None)
+            # workers' metrics never reach /metrics/prometheus, so don't record them
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=ctx,
+                                             initializer=metrics.enable, initargs=(False,))
+        return self._pool
+
+    async def _in_pool(self, fn, arg):
+        pool = self._executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, arg)
+        except BrokenExecutor:
+            # a worker died: drop the pool so the next request starts a fresh one
+            if self._pool is pool:
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def _score(self, pwds: List[str]) -> List[dict]:
+        return await self._in_pool(_score_batch, pwds)
+
+    async def _check(self, pwds: List[str]) -> List[dict]:
+        if self._client is None:
+            self._client = breach_async.RangeClient(bc.API_BASE, max_connections=self.max_connections)
+        results: Dict[str, dict] = {}
+        groups: Dict[str, Dict[str, List[str]]] = {}
+        bloom = bc._prefilter("sha1")
+        for pwd in dict.fromkeys(pwds):
+            if not pwd:
+                results[pwd] = bc._error("empty_password")
+                continue
+            full = bc.sha1_hex(pwd)
+            if bloom is not None and not bloom.might_contain(full):
+                results[pwd] = bc._result(0)
+                continue
+            groups.setdefault(full[:5], {}).setdefault(full[5:], []).append(pwd)
+
+        async def one(prefix: str, by_suffix: Dict[str, List[str]]):
+            for sfx, res in (await self._client.lookup_prefix(prefix, by_suffix)).items():
+                for pwd in by_suffix[sfx]:
+                    results[pwd] = res
+
+        await asyncio.gather(*(one(p, g) for p, g in groups.items()))
+        return [results[p] for p in pwds]
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---- endpoints ----
+
+    @staticmethod
+    def _passwords(body: dict) -> List[str]:
+        if "passwords" in body:
+            items = body["passwords"]
+            if not isinstance(items, list) or not all(isinstance(p, str) for p in items):
+                raise ValueError("'passwords' must be a list of strings")
+            if len(items) > MAX_ITEMS:
+                raise ValueError(f"at most {MAX_ITEMS} passwords per request")
+            return items
+        pwd = body.get("password")
+        if not isinstance(pwd, str):
+            raise ValueError("expected 'password' or 'passwords'")
+        return [pwd]
+
+    async def score(self, body: dict):
+        pwds = self._passwords(body)
+        results = await self.scorer.submit_many(pwds)
+        return {"results": results} if "passwords" in body else results[0]
+
+    async def check(self, body: dict):
+        pwds = self._passwords(body)
+        results = await self.checker.submit_many(pwds)
+        return {"results": results} if "passwords" in body else results[0]
+
+    @staticmethod
+    def _bounded(body: dict, key: str, default: int, hi: int) -> int:
+        value = body.get(key, default)
+        if not _is_int(value) or not 1 <= value <= hi:
+            raise ValueError(f"{key} must be an integer 1..{hi}")
+        return value
+
+    @staticmethod
+    def _optional(body: dict, key: str, check, what: str):
+        value = body.get(key)
+        if value is not None and not check(value):
+            raise ValueError(f"{key} must be {what}")
+        return value
+
+    async def generate(self, body: dict):
+        spec = {"count": self._bounded(body, "count", 1, MAX_ITEMS),
+                "passphrase": bool(body.get("passphrase"))}
+        if spec["passphrase"]:
+            exclude = body.get("exclude", [])
+            if not isinstance(exclude, list) or not all(isinstance(w, str) for w in exclude):
+                raise ValueError("exclude must be a list of strings")
+            word_len = lambda v: _is_int(v) and 1 <= v <= MAX_LENGTH
+            spec.update(
+                words=self._bounded(body, "words", 4, MAX_WORDS),
+                separator=self._optional(body, "separator", lambda v: isinstance(v, str), "a string") or "-",
+                capitalize=bool(body.get("capitalize")),
+                number=bool(body.get("number")), symbol=bool(body.get("symbol")),
+                min_entropy=self._optional(body, "min_entropy",
+                                           lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+                                           "a number"),
+                policy=dict(min_word_len=self._optional(body, "min_word_len", word_len, f"an integer 1..{MAX_LENGTH}"),
+                            max_word_len=self._optional(body, "max_word_len", word_len, f"an integer 1..{MAX_LENGTH}"),
+                            exclude=tuple(exclude), no_repeat=bool(body.get("no_repeat"))))
+        else:
+            spec.update(length=self._bounded(body, "length", 16, MAX_LENGTH),
+                        symbols=bool(body.get("symbols", True)))
+        return await self._in_pool(_generate, spec)
+
+    def metrics(self) -> dict:
+        latency = {}
+        for route, samples in self.latency.items():
+            ordered = sorted(samples)
+            pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e3, 2)
+            latency[route] = {"count": len(ordered), "p50_ms": pick(0.5), "p99_ms": pick(0.99)}
+        return {
+            "uptime": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "queue_depth": self.scorer.depth + self.checker.depth,
+            "score": self.scorer.stats(),
+            "check": self.checker.stats(),
+            "latency": latency,
+            "network": bc.network_stats(),
+            "cache": bc.cache_stats(),
+        }
+
+    # ---- HTTP ----
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(None, 2)
+                except ValueError:
+                    await self._send(writer, 400, {"error": "bad request line"}, close=True)
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = line.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                length = headers.get("content-length", "0") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    await self._send(writer, 400, {"error": "bad Content-Length"}, close=True)
+                    break
+                length = int(length)
+                if length > MAX_BODY:
+                    await self._send(writer, 413, {"error": "body too large"}, close=True)
+                    break
+                raw = await reader.readexactly(length) if length else b""
+                close = headers.get("connection", "").lower() == "close"
+                status, payload, extra = await self._dispatch(method, target.split("?", 1)[0], raw)
+                await self._send(writer, status, payload, close=close, extra=extra)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, raw: bytes):
+        routes = {"/score": self.score, "/check": self.check, "/generate": self.generate}
+        if path == "/healthz":
+            return 200, {"ok": True}, None
+        if path == "/metrics":
+            return 200, self.metrics(), None
+        if path == "/metrics/prometheus":
+            return 200, metrics.to_prometheus(), {"Content-Type": "text/plain; version=0.0.4"}
+        handler = routes.get(path)
+        if handler is None:
+            return 404, {"error": "not found"}, None
+        if method != "POST":
+            return 405, {"error": "use POST"}, {"Allow": "POST"}
+        self.requests += 1
+        t0 = time.perf_counter()
+        try:
+            body = json.loads(raw or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+            result = await handler(body)
+        except BatchItemError:
+            metrics.incr("http_responses_total", route=path, status=400)
+            return 400, {"error": "input could not be processed"}, None
+        except Overloaded:
+            self.rejected += 1
+            metrics.incr("http_responses_total", route=path, status=503)
+            return 503, {"error": "overloaded"}, {"Retry-After": "1"}
+        except BrokenExecutor:
+            metrics.incr("http_responses_total", route=path, status=503)
+            return 503, {"error": "workers restarting"}, {"Retry-After": "1"}
+        except ValueError as e:  # request validation; messages are ours
+            metrics.incr("http_responses_total", route=path, status=400)
+            return 400, {"error": str(e)}, None
+        except TypeError:
+            metrics.incr("http_responses_total", route=path, status=400)
+            return 400, {"error": "invalid request"}, None
+        except Exception as e:
+            metrics.incr("http_responses_total", route=path, status=500)
+            return 500, {"error": type(e).__name__}, None
+        elapsed = time.perf_counter() - t0
+        samples = self.latency.setdefault(path, deque(maxlen=LATENCY_WINDOW))
+        samples.append(elapsed)
+        if metrics.ENABLED:
+            metrics.incr("http_responses_total", route=path, status=200)
+            metrics.observe("http_request_seconds", elapsed, route=path)
+        return 200, result, None
+
+    @staticmethod
+    async def _send(writer, status: int, payload, close: bool = False, extra=None) -> None:
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}.get(status, "")
+        extra = dict(extra or {})
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+        else:
+            body = json.dumps(payload).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {reason}",
+                f"Content-Type: {extra.pop('Content-Type', 'application/json')}",
+                f"Content-Length: {len(body)}", "Cache-Control: no-store",
+                f"Connection: {'close' if close else 'keep-alive'}"]
+        head += [f"{k}: {v}" for k, v in extra.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8080, **kwargs) -> None:
+    service = Service(**kwargs)
+    server = await asyncio.start_server(service.handle, host, port)
+    addrs = ", ".join(str(s.getsockname()) for s in server.sockets)
+    print(f"psbc service listening on {addrs}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def build_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    p = parser or argparse.ArgumentParser(description="Run the scoring / breach HTTP service.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("-j", "--workers", type=int, default=2, help="scoring processes (0 = in-process threads)")
+    p.add_argument("--max-batch", type=int, default=256)
+    p.add_argument("--max-delay-ms", type=float, default=2.0, help="how long to wait for a batch to fill")
+    p.add_argument("--max-queue", type=int, default=10000, help="waiting items before 503")
+    p.add_argument("--connections", type=int, default=16, help="keep-alive connections to the range API")
+    p.add_argument("--metrics", action="store_true",
+                   help="record counters / histograms for /metrics/prometheus (metrics.py; off by default)")
+    bc.add_cli_arguments(p)
+    return p
+
+
+def run(args) -> int:
+    metrics.enable(args.metrics or metrics.ENABLED)
+    err = bc.configure_from_args(args)
+    if err:
+        print(f"psbc serve: {err}", file=sys.stderr)
+        return 2
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, max_batch=args.max_batch,
+                          max_delay=args.max_delay_ms / 1e3, max_queue=args.max_queue,
+                          max_connections=args.connections))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(build_parser().parse_args()))
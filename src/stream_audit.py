@@ -0,0 +1,242 @@
+# stream_audit.py
+"""
+Streaming audit: read passwords lazily (file, .gz or stdin), score them in
+small batches and write one record per input line as JSONL or CSV, in input
+order. Memory stays bounded by the batch size whatever the input size.
+
+With a checkpoint file the run records how many input lines have been fully
+written and how long the output was at that point; restarting with the same
+checkpoint trims any partial tail, skips those lines and carries on, so long
+runs survive interruption.
+"""
+from __future__ import annotations
+import argparse, csv, gzip, io, json, os, sys
+from collections import deque
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+from scorer_logic import LABELS, _numpy, compute_scores, reasons_from_mask
+
+FIELDS = ["line", "score", "label", "bits", "t1", "t2", "reasons",
+          "breached", "breach_count", "error"]
+
+
+def open_lines(path: str) -> Iterator[str]:
+    """Lines without their newline; '-' is stdin, '*.gz' is decompressed."""
+    if path == "-":
+        f: IO[str] = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+    elif path.endswith(".gz"):
+        f = gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    else:
+        f = open(path, "r", encoding="utf-8", errors="replace")
+    try:
+        for line in f:
+            yield line.rstrip("\r\n")
+    finally:
+        if path != "-":
+            f.close()
+
+
+def iter_records(lines: Iterable[str], breach: bool = False, batch_size: int = 1000,
+                 start: int = 0, include_password: bool = False,
+                 workers: int = 1) -> Iterator[Tuple[int, Optional[dict]]]:
+    """
+    Yield (line_number, record) for every input line after the first `start`,
+    in order. Empty lines yield (line_number, None) so callers can keep count.
+    With workers > 1 batches are scored in a forked process pool, at most
+    2 * workers batches in flight, and still yielded in input order; the
+    workers split the breach lookup rate between them.
+    """
+    it = iter(lines)
+    if start:
+        for _ in islice(it, start):
+            pass
+    batches = _batches(it, batch_size, start)
+    if workers <= 1:
+        for line_no, batch in batches:
+            yield from _batch_records(batch, line_no, breach, include_password)
+        return
+
+    import multiprocessing as mp
+    _numpy()  # import once in the parent so the workers inherit it
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("fork" if "fork" in methods else None)
+    initializer = None
+    if breach:
+        import breach_checker
+        initializer = breach_checker.share_rate
+    with ctx.Pool(workers, initializer=initializer, initargs=(workers,)) as pool:
+        pending = deque()
+        for line_no, batch in batches:
+            pending.append(pool.apply_async(_batch_records, (batch, line_no, breach, include_password)))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def _batches(it: Iterator[str], batch_size: int, line_no: int) -> Iterator[Tuple[int, List[str]]]:
+    while True:
+        batch: List[str] = list(islice(it, batch_size))
+        if not batch:
+            return
+        yield line_no, batch
+        line_no += len(batch)
+
+
+def _batch_records(batch: List[str], line_no: int, breach: bool,
+                   include_password: bool) -> List[Tuple[int, Optional[dict]]]:
+    items = [p for p in batch if p]
+    cols = compute_scores(items)
+    hits = {}
+    if breach and items:
+        import breach_checker
+        hits = dict(breach_checker.check_pwned_passwords(items))
+    out: List[Tuple[int, Optional[dict]]] = []
+    j = 0
+    for pwd in batch:
+        line_no += 1
+        if not pwd:
+            out.append((line_no, None))
+            continue
+        rec = {
+            "line": line_no,
+            "score": int(cols.score[j]),
+            "label": LABELS[cols.label[j]],
+            "bits": round(float(cols.bits[j]), 2),
+            "t1": float(cols.t1[j]),
+            "t2": float(cols.t2[j]),
+            "reasons": reasons_from_mask(int(cols.reasons[j])),
+        }
+        if breach:
+            res = hits[pwd]
+            rec["breached"] = res["found"]
+            rec["breach_count"] = res["count"]
+            rec["error"] = res["error"]
+        if include_password:
+            rec["password"] = pwd
+        j += 1
+        out.append((line_no, rec))
+    return out
+
+
+class JsonlWriter:
+    def __init__(self, f: IO[str]):
+        self.f = f
+
+    def write(self, rec: dict) -> None:
+        self.f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    def __init__(self, f: IO[str], fields: List[str], header: bool = True):
+        self.w = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        if header:
+            self.w.writeheader()
+
+    def write(self, rec: dict) -> None:
+        row = dict(rec)
+        if "reasons" in row:
+            row["reasons"] = " | ".join(rec["reasons"])
+        self.w.writerow(row)
+
+
+class Checkpoint:
+    """Input lines fully processed, and the output size at that point."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+
+    def load(self) -> Tuple[int, int]:
+        if not self.path or not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return int(data.get("lines_done", 0)), int(data.get("output_bytes", 0))
+
+    def save(self, lines_done: int, output_bytes: int) -> None:
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"lines_done": lines_done, "output_bytes": output_bytes}, f)
+        os.replace(tmp, self.path)
+
+
+def _commit(f: IO[str], ckpt: Checkpoint, done: int) -> None:
+    f.flush()
+    ckpt.save(done, f.tell() if f is not sys.stdout else 0)
+
+
+def run_stream(src: str, out: str = "-", fmt: str = "jsonl", breach: bool = False,
+               batch_size: int = 1000, checkpoint: Optional[str] = None,
+               include_password: bool = False, workers: int = 1) -> dict:
+    """Stream `src` to `out`; returns the records written and how many carry a lookup error."""
+    ckpt = Checkpoint(checkpoint)
+    start, out_bytes = ckpt.load()
+    resuming = start > 0 and out != "-" and os.path.exists(out)
+    if not resuming:
+        start = out_bytes = 0
+    if out == "-":
+        f = sys.stdout
+    else:
+        f = open(out, "r+" if resuming else "w", encoding="utf-8", newline="")
+        if resuming:
+            # drop records written after the last checkpoint, then append
+            f.truncate(out_bytes)
+            f.seek(out_bytes)
+    fields = FIELDS + (["password"] if include_password else [])
+    if not breach:
+        fields = [x for x in fields if x not in ("breached", "breach_count", "error")]
+    writer = CsvWriter(f, fields, header=not resuming) if fmt == "csv" else JsonlWriter(f)
+    written = errors = 0
+    done = start
+    try:
+        for line_no, rec in iter_records(open_lines(src), breach, batch_size, start, include_password, workers):
+            if rec is not None:
+                writer.write(rec)
+                written += 1
+                errors += rec.get("error") is not None
+            done = line_no
+            if done % batch_size == 0:
+                _commit(f, ckpt, done)
+        _commit(f, ckpt, done)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return {"written": written, "errors": errors}
+
+
+def build_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    p = parser or argparse.ArgumentParser(description="Stream-score a password file to JSONL/CSV.")
+    p.add_argument("path", help="input file ('-' for stdin, .gz accepted)")
+    p.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    p.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    p.add_argument("--breach", action="store_true", help="add HIBP breach results")
+    p.add_argument("--batch-size", type=int, default=1000)
+    p.add_argument("-j", "--workers", type=int, default=1, help="scoring processes (default: 1)")
+    p.add_argument("--checkpoint", default=None, help="resume file for long runs")
+    p.add_argument("--include-password", action="store_true",
+                   help="copy the plaintext into each record (off by default)")
+    import breach_checker
+    breach_checker.add_cli_arguments(p)
+    return p
+
+
+def run(args) -> int:
+    if args.breach:
+        import breach_checker
+        err = breach_checker.configure_from_args(args)
+        if err:
+            print(f"psbc score: {err}", file=sys.stderr)
+            return 2
+    summary = run_stream(args.path, args.output, args.format, args.breach, args.batch_size,
+                         args.checkpoint, args.include_password, args.workers)
+    if summary["errors"]:
+        print(f"psbc score: {summary['errors']:,} lookup errors", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(build_parser().parse_args()))
@@ -1,12 +1,26 @@
 import threading
-try:
-    import breach_checker as breach
-except Exception:
-    breach = None
+
+# breach_checker pulls in urllib/ssl and loads CA certificates, so it is
+# imported on first use (or by the background warm-up), not at startup
+breach = None
+_BREACH_TRIED = False
+_BREACH_LOCK = threading.Lock()
+
+def _load_breach():
+    global breach, _BREACH_TRIED
+    with _BREACH_LOCK:
+        if not _BREACH_TRIED:
+            try:
+                import breach_checker
+                breach = breach_checker
+            except Exception:
+                breach = None
+            _BREACH_TRIED = True
+    return breach
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from scorer_logic import compute_score
+from score_cache import ScoreCache
 from entropy import format_duration
 from password_generator import generate_password
 
@@ -17,6 +31,69 @@ except Exception as e:
     print("Passphrase module load error:", e)
     pgen = None
 
+FRAME_MS = 16  # UI results are applied at most once per frame
+
+class LatestJobRunner:
+    """
+    One daemon worker thread that runs at most one job at a time. Submitting
+    while busy replaces the queued job (older queued work is simply dropped),
+    and each finished result carries the generation it was submitted with so
+    the UI can ignore anything stale.
+    """
+
+    def __init__(self, fn, name: str):
+        self._fn = fn
+        self._cond = threading.Condition()
+        self._next = None       # (generation, arg) waiting to run
+        self._done = None       # (generation, arg, result) waiting for the UI
+        self.busy = False
+        threading.Thread(target=self._loop, name=name, daemon=True).start()
+
+    def submit(self, generation: int, arg) -> None:
+        with self._cond:
+            self._next = (generation, arg)
+            self._cond.notify()
+
+    def take_result(self):
+        with self._cond:
+            done, self._done = self._done, None
+            return done
+
+    def pending(self) -> bool:
+        with self._cond:
+            return self.busy or self._next is not None or self._done is not None
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._next is None:
+                    self._cond.wait()
+                generation, arg = self._next
+                self._next = None
+                self.busy = True
+            try:
+                result = self._fn(arg)
+            except Exception as e:
+                result = e
+            with self._cond:
+                self._done = (generation, arg, result)
+                self.busy = False
+
+
+def _warm_up():
+    """Load the dictionary automaton, wordlist and network stack off the Tk thread."""
+    try:
+        import patterns
+        patterns._matcher()
+        if pgen is not None:
+            pgen._words()
+        mod = _load_breach()
+        if mod is not None:
+            mod.warm_up()
+    except Exception:
+        pass
+
+
 def show_about():
     messagebox.showinfo(
         "About PSBC",
@@ -29,6 +106,8 @@ def show_about():
 
 def create_main_window():
     root = tk.Tk()
+    # memoised, prefix-incremental scoring for per-keystroke updates
+    _scores = ScoreCache(maxsize=512, incremental=True)
     # after: root = tk.Tk()
     if pgen is None:
         messagebox.showerror(
@@ -193,10 +272,35 @@ def create_main_window():
         else:
             score_bar.configure(style="Strong.Horizontal.TProgressbar")
 
+    # ---- background scoring / breach jobs ----
+    _jobs = {"score_gen": 0, "breach_gen": 0, "pump": None, "text": ""}
+    _pollers = []  # (runner, apply(generation, arg, result))
+
+    def _pump():
+        # one pass per frame: apply the newest finished result of each runner
+        _jobs["pump"] = None
+        busy = False
+        for runner, apply in _pollers:
+            done = runner.take_result()
+            if done is not None:
+                apply(*done)
+            busy = busy or runner.pending()
+        if busy:
+            _start_pump()
+
+    def _start_pump():
+        if _jobs["pump"] is None:
+            _jobs["pump"] = root.after(FRAME_MS, _pump)
+
     def update_view(pwd: str):
         length_value_label.config(text=str(len(pwd)))
+        if pwd != _jobs["text"]:
+            # typed, generated or pasted: a breach result for the old text is stale
+            _jobs["text"] = pwd
+            _jobs["breach_gen"] += 1
 
         if len(pwd) == 0:
+            _jobs["score_gen"] += 1  # drop any result still in flight
             status_label.config(text="Type a password…")
             score_bar["value"] = 0
             score_label.config(text="Score: 0 (Weak)")
@@ -207,7 +311,22 @@ def create_main_window():
             set_bar_style("weak")
             return
 
-        score, label, reasons, bits, t1, t2 = compute_score(pwd)
+        _jobs["score_gen"] += 1
+        _score_runner.submit(_jobs["score_gen"], pwd)
+        _start_pump()
+
+    def _apply_score(generation, pwd, result):
+        if generation == _jobs["score_gen"]:  # older keystrokes are dropped
+            render_score(result)
+
+    _score_runner = LatestJobRunner(_scores.compute, "psbc-score")
+    _pollers.append((_score_runner, _apply_score))
+
+    def render_score(result):
+        if isinstance(result, Exception):
+            status_label.config(text=f"Scoring error: {type(result).__name__}")
+            return
+        score, label, reasons, bits, t1, t2 = result
         score_bar["value"] = score
         score_label.config(text=f"Score: {score} ({label})")
         set_bar_style(label.lower())
@@ -435,40 +554,60 @@ def create_main_window():
             except Exception:
                 pass
 
-        def _breach_worker(pwd_snapshot: str):
-            if breach is None:
-                root.after(0, lambda: _set_breach("Module missing: breach_checker.py", "#b00020"))
-                root.after(0, lambda: breach_btn.config(state="normal"))
+        def _check(pwd_snapshot: str):
+            mod = _load_breach()
+            if mod is None:
+                return {"ok": False, "found": False, "count": 0, "error": "module_missing"}
+            # one worker serves every check: fail fast on 429 instead of sleeping
+            return mod.check_pwned_password(pwd_snapshot, retry=mod.INTERACTIVE_RETRY)
+
+        _breach_runner = LatestJobRunner(_check, "psbc-breach")
+
+        def _apply_breach(generation, pwd, result):
+            if generation != _jobs["breach_gen"]:
+                # superseded; the newer check (if any) will report
+                if not _breach_runner.pending():
+                    breach_btn.config(state="normal")
+                    _set_breach("Ready")
+                return
+            breach_btn.config(state="normal")
+            if isinstance(result, Exception):
+                _set_breach("Error checking password.", "#b00020")
                 return
-            result = breach.check_pwned_password(pwd_snapshot)
-
-            def finish():
-                breach_btn.config(state="normal")
-                if not result["ok"]:
-                    err = result.get("error", "error")
-                    if isinstance(err, str) and err.startswith("rate_limited:"):
-                        secs = err.split(":")[1]
-                        _set_breach(f"Rate limited. Retry after ~{secs}s.", "#b00020")
-                    elif err == "network_error":
-                        _set_breach("Network error. Check connection and try again.", "#b00020")
-                    else:
-                        _set_breach("Error checking password.", "#b00020")
-                    return
-                if result["found"]:
-                    _set_breach(f"⚠️ PWNED: seen {result['count']:,} times.", "#b00020")
+            if not result["ok"]:
+                err = result.get("error", "error")
+                if isinstance(err, str) and err.startswith("rate_limited:"):
+                    secs = err.split(":")[1]
+                    _set_breach(f"Rate limited. Retry after ~{secs}s.", "#b00020")
+                elif err == "network_error":
+                    _set_breach("Network error. Check connection and try again.", "#b00020")
+                elif err == "circuit_open":
+                    _set_breach("Breach service unavailable. Try again shortly.", "#b00020")
+                elif err == "module_missing":
+                    _set_breach("Module missing: breach_checker.py", "#b00020")
+                elif err == "index_error":
+                    _set_breach("Offline index unreadable (check PSBC_OFFLINE_INDEX).", "#b00020")
                 else:
-                    _set_breach("✅ Not found in HIBP.", "#2b8a3e")
+                    _set_breach("Error checking password.", "#b00020")
+                return
+            if result["found"]:
+                _set_breach(f"⚠️ PWNED: seen {result['count']:,} times.", "#b00020")
+            else:
+                _set_breach("✅ Not found in HIBP.", "#2b8a3e")
 
-            root.after(0, finish)
+        _pollers.append((_breach_runner, _apply_breach))
 
         def start_breach_check(event=None):
+            _breach_after["id"] = None
             pwd = password_var.get()
             if not pwd:
                 _set_breach("Enter a password first.", "#666")
                 return
             breach_btn.config(state="disabled")
             _set_breach("Checking…", "#666")
-            threading.Thread(target=_breach_worker, args=(pwd,), daemon=True).start()
+            _jobs["breach_gen"] += 1
+            _breach_runner.submit(_jobs["breach_gen"], pwd)
+            _start_pump()
 
         breach_btn.config(command=start_breach_check)
 
@@ -505,6 +644,7 @@ def create_main_window():
     )
     footer.pack(side="bottom", pady=4)
 
-
+    # let the first frame paint, then warm the heavy resources in the background
+    root.after(100, lambda: threading.Thread(target=_warm_up, name="psbc-warm-up", daemon=True).start())
 
     return root